@@ -43,7 +43,8 @@ class VectorKnowledgeChatAPI:
         self.vector_db = FAISSPersistence(
             index_path=index_path,
             metadata_path=metadata_path,
-            embedding_model=embedding_model
+            embedding_model=embedding_model,
+            read_only=True
         )
         
         self.top_k_docs = top_k_docs
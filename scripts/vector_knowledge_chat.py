@@ -5,23 +5,35 @@
 将向量数据库中的知识作为LLM的上下文，实现基于知识库的对话
 """
 import os
+import re
 import sys
 import json
 import logging
+import requests
+from collections import deque
 from typing import List, Dict
 from datetime import datetime, timedelta
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# 导入所需的模块
+# 导入所需的模块（向量数据库依赖faiss/sentence-transformers，较重，延迟到初始化时导入）
 from src.llm_analysis.llm_analyzer import LLMAnalyzer
-from src.storage.vector_db import FAISSPersistence
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 统计类查询的关键词，预编译为一个正则以便一次匹配
+STATS_KEYWORDS = [
+    "多少个文档", "文档总数", "总共有多少", "有多少篇",
+    "文档数量", "数据库大小", "统计信息"
+]
+_STATS_RE = re.compile('|'.join(map(re.escape, STATS_KEYWORDS)))
+
+# 提示词中保留的最近对话轮数
+MAX_HISTORY_TURNS = 5
+
 class VectorKnowledgeChat:
     """基于向量数据库的知识对话类"""
     
@@ -53,17 +65,20 @@ class VectorKnowledgeChat:
         self.analyzer = LLMAnalyzer(use_real_llm=True, ollama_url=ollama_url, model=model)
         
         # 初始化向量数据库
+        from src.storage.vector_db import FAISSPersistence
         self.vector_db = FAISSPersistence(
             index_path=index_path,
             metadata_path=metadata_path,
-            embedding_model=embedding_model
+            embedding_model=embedding_model,
+            read_only=True
         )
         
         self.top_k_docs = top_k_docs
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
-        self.conversation_history = []
+        # 只保留最近几轮对话，旧记录自动淘汰
+        self.conversation_history = deque(maxlen=MAX_HISTORY_TURNS)
         
         # 打印初始化信息
         stats = self.vector_db.get_statistics()
@@ -80,35 +95,32 @@ class VectorKnowledgeChat:
         Returns:
             完整的提示词字符串
         """
-        # 构建上下文信息
-        context = "基于以下提供的知识，回答用户的问题。如果你无法从提供的知识中找到答案，请如实告知。\n\n"
-        context += "相关知识：\n"
+        # 构建上下文信息（先收集片段，最后一次性拼接，避免字符串反复拷贝）
+        parts = [
+            "基于以下提供的知识，回答用户的问题。如果你无法从提供的知识中找到答案，请如实告知。\n\n",
+            "相关知识：\n"
+        ]
         
         for i, doc in enumerate(relevant_docs):
             title = doc.get('title', f'文档{i+1}')
-            content = doc.get('content', '')
+            # 优先使用入库时预先截取的片段，旧数据回退到content字段
+            content = doc.get('snippet_500') or doc.get('content', '')[:500]
             publish_time = doc.get('publish_time', '未知')
             
-            # 限制每篇文档的内容长度
-            max_content_len = 500
-            if len(content) > max_content_len:
-                content = content[:max_content_len] + "..."
-            
-            context += f"【文档{i+1}】标题：{title}\n发布时间：{publish_time}\n内容：{content}\n\n"
+            parts.append(f"【文档{i+1}】标题：{title}\n发布时间：{publish_time}\n内容：{content}\n\n")
         
         # 添加对话历史（最近5轮）
         if self.conversation_history:
-            recent_history = self.conversation_history[-5:]
-            context += "历史对话：\n"
-            for i, (q, a) in enumerate(recent_history):
-                context += f"用户：{q}\n助手：{a}\n"
-            context += "\n"
+            parts.append("历史对话：\n")
+            for q, a in self.conversation_history:
+                parts.append(f"用户：{q}\n助手：{a}\n")
+            parts.append("\n")
         
         # 添加用户当前查询
-        context += f"用户问题：{query}\n"
-        context += "请基于上述知识，用中文回答用户问题。"
+        parts.append(f"用户问题：{query}\n")
+        parts.append("请基于上述知识，用中文回答用户问题。")
         
-        return context
+        return "".join(parts)
     
     def search_relevant_docs(self, query: str, start_date: str = None, end_date: str = None) -> List[Dict]:
         """搜索与查询相关的文档
@@ -123,17 +135,15 @@ class VectorKnowledgeChat:
         """
         # 如果指定了日期范围，使用日期过滤
         if start_date and end_date:
-            # 先按日期范围获取文档
-            date_filtered_docs = self.vector_db.get_by_date_range(start_date, end_date, top_k=self.top_k_docs * 5)
+            # 只在日期范围内的文档向量上进行相似度排序
+            date_filtered_docs = self.vector_db.search_in_date_range(query, start_date, end_date, top_k=self.top_k_docs)
             
             # 如果没有符合日期范围的文档，回退到普通搜索
             if not date_filtered_docs:
                 logger.warning(f"没有找到 {start_date} 至 {end_date} 期间的文档，将使用全部文档进行搜索")
                 return self.vector_db.search(query, top_k=self.top_k_docs)
             
-            # 对于日期过滤后的文档，再次进行相似度排序
-            # 这里简化处理，直接使用FAISS的搜索功能
-            return self.vector_db.search(query, top_k=self.top_k_docs, start_date=start_date, end_date=end_date)
+            return date_filtered_docs
         else:
             # 直接搜索所有文档
             return self.vector_db.search(query, top_k=self.top_k_docs)
@@ -147,18 +157,8 @@ class VectorKnowledgeChat:
         Returns:
             是否为统计类查询
         """
-        # 定义统计查询的关键词
-        stats_keywords = [
-            "多少个文档", "文档总数", "总共有多少", "有多少篇", 
-            "文档数量", "数据库大小", "统计信息"
-        ]
-        
         # 检查查询中是否包含统计关键词
-        for keyword in stats_keywords:
-            if keyword in query:
-                return True
-        
-        return False
+        return _STATS_RE.search(query) is not None
     
     def generate_statistics_response(self) -> str:
         """生成统计信息的回答
@@ -169,19 +169,19 @@ class VectorKnowledgeChat:
         stats = self.vector_db.get_statistics()
         total_docs = stats.get('total_documents', 0)
         
-        response = f"向量数据库中目前共有 {total_docs} 篇文档。\n\n"
+        parts = [f"向量数据库中目前共有 {total_docs} 篇文档。\n\n"]
         
         # 添加其他统计信息
         channels = stats.get('channels', {})
         if channels and len(channels) > 1:
-            response += "按频道分布情况：\n"
+            parts.append("按频道分布情况：\n")
             for channel, count in channels.items():
-                response += f"- {channel}: {count} 篇文档\n"
+                parts.append(f"- {channel}: {count} 篇文档\n")
         
         # 提供额外提示
-        response += "\n提示：您可以输入 'stats' 命令查看更详细的统计信息。"
+        parts.append("\n提示：您可以输入 'stats' 命令查看更详细的统计信息。")
         
-        return response
+        return "".join(parts)
     
     def generate_response(self, query: str, start_date: str = None, end_date: str = None) -> str:
         """生成基于向量数据库知识的回答
@@ -221,7 +221,6 @@ class VectorKnowledgeChat:
         try:
             # 这里我们复用LLMAnalyzer的_call_llm_api方法，但需要调整提示词和解析逻辑
             # 由于我们只需要生成回答，不需要提取摘要、关键词等，可以直接调用API
-            import requests
             response = requests.post(
                 self.analyzer.ollama_url,
                 json={
@@ -253,15 +252,17 @@ class VectorKnowledgeChat:
     
     def start_chat(self):
         """启动交互式对话"""
-        print("=" * 80)
-        print("欢迎使用向量数据库知识对话工具！")
-        print("说明：")
-        print("  1. 输入您的问题进行对话")
-        print("  2. 输入 'quit' 或 'exit' 退出对话")
-        print("  3. 输入 'clear' 清空对话历史")
-        print("  4. 输入 'stats' 查看向量数据库统计信息")
-        print("  5. 可以使用 'date:2023-01-01,2023-12-31' 格式来限制日期范围")
-        print("=" * 80)
+        print("\n".join([
+            "=" * 80,
+            "欢迎使用向量数据库知识对话工具！",
+            "说明：",
+            "  1. 输入您的问题进行对话",
+            "  2. 输入 'quit' 或 'exit' 退出对话",
+            "  3. 输入 'clear' 清空对话历史",
+            "  4. 输入 'stats' 查看向量数据库统计信息",
+            "  5. 可以使用 'date:2023-01-01,2023-12-31' 格式来限制日期范围",
+            "=" * 80
+        ]))
         
         while True:
             try:
@@ -273,19 +274,22 @@ class VectorKnowledgeChat:
                     print("感谢使用，再见！")
                     break
                 elif user_input.lower() == 'clear':
-                    self.conversation_history = []
+                    self.conversation_history.clear()
                     print("对话历史已清空")
                     continue
                 elif user_input.lower() == 'stats':
                     stats = self.vector_db.get_statistics()
-                    print("\n向量数据库统计信息:")
-                    print(f"  总文档数: {stats.get('total_documents', 0)}")
-                    print(f"  索引大小: {stats.get('index_size', 0) / 1024:.2f} KB")
-                    print(f"  元数据大小: {stats.get('metadata_size', 0) / 1024:.2f} KB")
-                    print(f"  嵌入模型: {stats.get('embedding_model', 'unknown')}")
-                    print("  按频道统计:")
+                    lines = [
+                        "\n向量数据库统计信息:",
+                        f"  总文档数: {stats.get('total_documents', 0)}",
+                        f"  索引大小: {stats.get('index_size', 0) / 1024:.2f} KB",
+                        f"  元数据大小: {stats.get('metadata_size', 0) / 1024:.2f} KB",
+                        f"  嵌入模型: {stats.get('embedding_model', 'unknown')}",
+                        "  按频道统计:"
+                    ]
                     for channel, count in stats.get('channels', {}).items():
-                        print(f"    {channel}: {count} 篇")
+                        lines.append(f"    {channel}: {count} 篇")
+                    print("\n".join(lines))
                     continue
                 
                 # 检查是否包含日期范围
@@ -334,8 +338,7 @@ if __name__ == "__main__":
     parser.add_argument('--model', type=str, default='deepseek-r1:7b', help='使用的LLM模型名称')
     parser.add_argument('--index-path', type=str, default='vector_index.faiss', help='FAISS索引文件路径')
     parser.add_argument('--metadata-path', type=str, default='vector_metadata.json', help='元数据文件路径')
-    # 修改第331行左右的代码
-    parser.add_argument('--top-k', type=int, default=33, help='搜索时返回的最大相关文档数')
+    parser.add_argument('--top-k', type=int, default=3, help='搜索时返回的最大相关文档数')
     
     args = parser.parse_args()
     
@@ -9,6 +9,7 @@
 import time
 import sys
 import os
+import hashlib
 
 # 将项目根目录添加到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -16,7 +17,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 # 导入配置
 from scripts.config import CRAWLER_PAGE_CONFIG
 
-from src.core.crawler import UniversalWebExtractor
+from src.core.crawler import UniversalWebExtractor, HAS_REQUESTS_CACHE, create_cached_session
 from src.storage.data_persistence import get_default_manager
 from tqdm import tqdm
 from bs4 import BeautifulSoup
@@ -29,6 +30,7 @@ except ImportError:
     HAS_FAISS = False
 
 # 默认配置
+PUBLISH_TIME_CACHE_SIZE = 4096  # 发布时间解析结果缓存条数
 
 
 class UniversalPageCrawler:
@@ -38,6 +40,17 @@ class UniversalPageCrawler:
         """初始化爬虫"""
         self.persistence_manager = get_default_manager()
         
+        # 共享的HTTP会话，如果可用则使用基于SQLite的缓存会话
+        self.session = None
+        if HAS_REQUESTS_CACHE:
+            self.session = create_cached_session()
+        
+        # 按HTML内容摘要缓存发布时间解析结果
+        self._publish_time_cache = {}
+        
+        # 按是否使用Selenium缓存的提取器，避免每个页面都重新启动浏览器
+        self._extractors = {}
+        
         # 初始化FAISS向量数据库（如果可用）
         self.faiss_db = None
         if HAS_FAISS:
@@ -90,7 +103,21 @@ class UniversalPageCrawler:
         return article_links
         
     def extract_publish_time(self, html):
-        """从文章HTML中提取发布时间"""
+        """从文章HTML中提取发布时间（相同内容的页面只解析一次）"""
+        key = hashlib.blake2b(html.encode('utf-8'), digest_size=8).digest()
+        if key in self._publish_time_cache:
+            return self._publish_time_cache[key]
+        
+        publish_time = self._parse_publish_time(html)
+        
+        # 超出容量时淘汰最早加入的条目
+        if len(self._publish_time_cache) >= PUBLISH_TIME_CACHE_SIZE:
+            self._publish_time_cache.pop(next(iter(self._publish_time_cache)))
+        self._publish_time_cache[key] = publish_time
+        return publish_time
+
+    def _parse_publish_time(self, html):
+        """解析文章HTML中的发布时间"""
         try:
             soup = BeautifulSoup(html, 'html.parser')
             
@@ -135,10 +162,25 @@ class UniversalPageCrawler:
         
         return None
 
+    def _get_extractor(self, use_selenium):
+        """获取（必要时创建）可复用的网页提取器"""
+        if use_selenium not in self._extractors:
+            self._extractors[use_selenium] = UniversalWebExtractor(use_selenium=use_selenium, session=self.session)
+        return self._extractors[use_selenium]
+
+    def close(self):
+        """关闭所有缓存的提取器"""
+        for extractor in self._extractors.values():
+            try:
+                extractor.close()
+            except Exception as e:
+                print(f"关闭提取器时出错: {e}")
+        self._extractors.clear()
+
     def crawl_page(self, url, use_selenium=False, extract_articles=True):
         """爬取单个页面"""
         try:
-            extractor = UniversalWebExtractor(use_selenium=use_selenium)
+            extractor = self._get_extractor(use_selenium)
             
             # 获取页面HTML（直接调用底层方法获取原始HTML）
             if use_selenium:
@@ -170,7 +212,6 @@ class UniversalPageCrawler:
             
             # 使用smart_extract获取页面内容
             result = extractor.smart_extract(url)
-            extractor.close()
             
             # 添加元数据
             result['crawl_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
@@ -200,10 +241,13 @@ class UniversalPageCrawler:
         
         # 开始爬取
         results = []
-        for url in tqdm(urls, desc="爬取进度"):
-            print(f"正在爬取: {url}")
-            result = self.crawl_page(url, use_selenium, extract_articles)
-            results.append(result)
+        try:
+            for url in tqdm(urls, desc="爬取进度"):
+                print(f"正在爬取: {url}")
+                result = self.crawl_page(url, use_selenium, extract_articles)
+                results.append(result)
+        finally:
+            self.close()
         
         # 保存结果到JSON文件
         if output_file:
@@ -223,6 +267,7 @@ class UniversalPageCrawler:
             if success_docs:
                 print(f"将 {len(success_docs)} 个文档保存到向量数据库...")
                 self.faiss_db.save(success_docs)
+                self.faiss_db.flush()
         
         return results
 
@@ -1,8 +1,20 @@
+import asyncio
 import requests
 import json
 import re
+import codecs
+import threading
+import copy
+import functools
+from dataclasses import dataclass
+from html import unescape
+from typing import Optional
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
 import trafilatura
 from readability import Document
 import time
@@ -10,35 +22,231 @@ import logging
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# urllib3只在安装了brotli/zstandard时才能解码br/zstd压缩的响应，
+# 请求头中只声明实际能解码的压缩格式
+if 'br' not in ACCEPT_ENCODING:
+    logger.warning("未安装brotli，无法接收br压缩的响应，建议安装brotli以减少传输量")
+
+# 优先使用基于libxml2的lxml解析器，未安装时回退到内置的html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# 尝试导入aiohttp（可选），用于并发抓取多个页面
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+# 尝试导入orjson（可选），JSON序列化和解析比标准库json快数倍
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# 尝试导入HTTP缓存模块（可选），重复抓取同一URL时走本地缓存或条件请求
+try:
+    from requests_cache import CachedSession
+    HAS_REQUESTS_CACHE = True
+except ImportError:
+    HAS_REQUESTS_CACHE = False
+
+# 尝试导入cchardet（可选），作为页面未声明编码时的快速编码检测
+try:
+    import cchardet
+    HAS_CCHARDET = True
+except ImportError:
+    HAS_CCHARDET = False
+
+# 尝试导入selectolax（可选），其Lexbor后端做CSS选择和属性读取比BeautifulSoup快得多
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+# 提取发布时间只需要这几类标签，解析时跳过其余节点
+PUBLISH_TIME_STRAINER = SoupStrainer(['div', 'meta', 'span'])
+
+# 定位正文区域的CSS选择器，合并为两组以减少DOM遍历次数：
+# 先匹配明确的正文标签/类名，找不到再尝试模糊类名和main，组内按文档顺序取第一个
+CONTENT_SELECTOR_GROUPS = (
+    'article, .content, .article-content, .post-content, .entry-content',
+    '[class*="content"], [class*="article"], main'
+)
+
+# 其他常见的发布时间位置
+PUBLISH_TIME_SELECTORS = (
+    '.time',
+    '.pubtime',
+    '.release-time',
+    'span.time',
+    'meta[name="pubdate"]',
+    'meta[property="article:published_time"]'
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _compiled_selector(css):
+    """编译并缓存CSS选择器，重复使用时跳过选择器解析"""
+    return soupsieve.compile(css)
+
+
+# HTTP缓存配置
+HTTP_CACHE_NAME = 'crawler_cache'
+HTTP_CACHE_EXPIRE = 3600  # HTTP缓存有效期（秒）
+
+
+def create_cached_session():
+    """创建基于SQLite的缓存会话，遵循Cache-Control并用ETag/Last-Modified做条件请求"""
+    return CachedSession(
+        HTTP_CACHE_NAME,
+        backend='sqlite',
+        expire_after=HTTP_CACHE_EXPIRE,
+        cache_control=True,
+        allowable_codes=(200, 301, 302)
+    )
+
+
+# Selenium等待页面加载完成的最长时间（秒）
+SELENIUM_WAIT_TIMEOUT = 15
+
+# 浏览器每加载这么多页面后重启一次，避免长时间爬取时内存持续增长
+SELENIUM_RECYCLE_PAGES = 200
+
+# 在浏览器中一次性取回标题、HTML和正文图片，避免多次WebDriver往返
+# arguments[0]为正文区域选择器分组，定位逻辑与_find_content_area一致
+_JS_EXTRACT = """
+const groups = arguments[0];
+let area = null;
+for (const selector of groups) {
+    area = document.querySelector(selector);
+    if (area) break;
+}
+area = area || document.body || document.documentElement;
+const imgs = [];
+area.querySelectorAll('img').forEach((img, i) => {
+    const src = img.getAttribute('src') || img.getAttribute('data-src') || img.getAttribute('data-original');
+    if (src) {
+        imgs.push({
+            url: new URL(src, document.baseURI).href,
+            alt: img.getAttribute('alt') || '',
+            width: img.getAttribute('width'),
+            height: img.getAttribute('height'),
+            position: i,
+            id: 'img_' + i
+        });
+    }
+});
+return {title: document.title, html: document.documentElement.outerHTML, imgs: imgs};
+"""
+
+# 日期时间格式，如 2025-09-21 06:05
+_DATE_TIME_RE = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}')
+
+# 页面<title>标签的内容
+_TITLE_RE = re.compile(r'<title[^>]*>([^<]{1,500})</title>', re.I | re.S)
+
+# 页面头部meta标签中声明的字符集
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+
+# 多余的空行（分组1）或连续的空格/制表符
+_WHITESPACE_RE = re.compile(r'(\n\s*\n)|[ \t]+')
+
+
+@dataclass
+class ImageRef:
+    """正文中的一张图片，position为其在正文img标签中的序号"""
+    # 显式声明__slots__（dataclass的slots参数需要Python 3.10+）
+    __slots__ = ('url', 'alt', 'width', 'height', 'position', 'id')
+
+    url: str
+    alt: str
+    width: Optional[str]
+    height: Optional[str]
+    position: int
+    id: str
+
+    def as_dict(self, fields):
+        """转换为只包含指定字段的字典，用于写入提取结果"""
+        return {field: getattr(self, field) for field in fields}
+
+
+# 各图片提取方法返回的字段
+IMAGE_FIELDS = ('url', 'alt', 'width', 'height')
+IMAGE_MARKER_FIELDS = ('url', 'alt', 'width', 'height', 'id')
+IMAGE_POSITION_FIELDS = ('url', 'alt', 'width', 'height', 'position', 'id')
+
 
 class UniversalWebExtractor:
-    def __init__(self, use_selenium=False):
+    def __init__(self, use_selenium=False, session=None, use_cache=True):
         """
         初始化通用网页提取器
 
         Args:
             use_selenium: 是否使用Selenium处理动态加载页面
+            session: 可选的requests会话（例如带缓存的CachedSession），不提供时新建
+            use_cache: 新建会话时是否使用HTTP缓存（需要安装requests-cache）
         """
         self.use_selenium = use_selenium
-        self.session = requests.Session()
+        if session is not None:
+            self.session = session
+        elif use_cache and HAS_REQUESTS_CACHE:
+            self.session = create_cached_session()
+        else:
+            self.session = requests.Session()
+        self.setup_session()
         self.setup_headers()
 
+        # 最近一次解析的(html, soup)，同一页面的多个提取步骤共用一棵解析树
+        self._soup_cache = None
+
+        # 最近一次正文图片提取的(html, base_url, 结果)，正文文本和图片列表只计算一次
+        self._extract_cache = None
+
+        # Selenium最近一次通过JS取回的页面快照（标题、HTML、正文图片）
+        self._page_snapshot = None
+
+        # 当前浏览器实例已加载的页面数
+        self._selenium_runs = 0
+
+        # 浏览器实例同一时间只能加载一个页面，多线程调用时串行执行Selenium提取
+        self._selenium_lock = threading.Lock()
+
         if use_selenium:
             self.driver = self.setup_selenium()
 
+    def setup_session(self):
+        """配置连接池和重试策略，复用到同一主机的keep-alive连接"""
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
     def setup_headers(self):
         """设置请求头，模拟真实浏览器"""
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         })
 
@@ -50,6 +258,12 @@ class UniversalWebExtractor:
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-gpu')
         chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+        # 不下载图片和样式表，图片地址直接从DOM中读取
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'permissions.default.stylesheet': 2
+        })
 
         service = Service(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
@@ -71,33 +285,106 @@ class UniversalWebExtractor:
         """使用requests获取页面内容"""
         response = self.session.get(url, timeout=10)
         response.raise_for_status()
-        response.encoding = response.apparent_encoding
+        response.encoding = self._detect_encoding(response)
         return response.text
 
-    def get_content_with_selenium(self, url):
-        """使用Selenium获取动态页面内容"""
+    def _detect_encoding(self, response):
+        """确定响应编码：优先使用HTTP头，其次页面meta声明，都没有时才对内容做检测"""
+        if 'charset' in response.headers.get('Content-Type', '').lower():
+            return response.encoding
+
+        match = _META_CHARSET_RE.search(response.content[:4096])
+        if match:
+            declared = match.group(1).decode('ascii')
+            try:
+                codecs.lookup(declared)
+                return declared
+            except LookupError:
+                pass
+
+        if HAS_CCHARDET:
+            return cchardet.detect(response.content)['encoding'] or 'utf-8'
+        return response.apparent_encoding
+
+    def get_content_with_selenium(self, url, wait_selector=None):
+        """使用Selenium获取动态页面内容
+
+        Args:
+            url: 页面URL
+            wait_selector: 可选的CSS选择器，指定时等待该元素出现，否则等待文档加载完成
+        """
+        if self._selenium_runs >= SELENIUM_RECYCLE_PAGES:
+            self._recycle_driver()
+        self._selenium_runs += 1
+
         self.driver.get(url)
-        time.sleep(3)  # 等待页面加载
-        return self.driver.page_source
+        try:
+            wait = WebDriverWait(self.driver, SELENIUM_WAIT_TIMEOUT)
+            if wait_selector:
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector)))
+            else:
+                wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+        except TimeoutException:
+            logger.warning(f"等待页面加载超时({SELENIUM_WAIT_TIMEOUT}秒)，使用当前页面内容: {url}")
+
+        # 一次JS调用取回页面数据，失败时退回到page_source
+        try:
+            snapshot = self.driver.execute_script(_JS_EXTRACT, list(CONTENT_SELECTOR_GROUPS))
+            snapshot['imgs'] = [ImageRef(**img) for img in snapshot['imgs']]
+            self._page_snapshot = snapshot
+            return snapshot['html']
+        except Exception as e:
+            logger.warning(f"通过JS提取页面数据失败: {e}")
+            self._page_snapshot = None
+            return self.driver.page_source
 
-    def extract_with_trafilatura(self, html, url):
+    def _recycle_driver(self):
+        """关闭当前浏览器并启动新的实例，释放长时间运行积累的内存"""
+        logger.info(f"浏览器已加载{self._selenium_runs}个页面，重启浏览器")
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"关闭浏览器失败: {e}")
+        self.driver = self.setup_selenium()
+        self._selenium_runs = 0
+
+    def _snapshot_for(self, html):
+        """返回与该HTML对应的Selenium页面快照，没有则返回None"""
+        snapshot = self._page_snapshot
+        if snapshot is not None and snapshot.get('html') is html:
+            return snapshot
+        return None
+
+    def _parse(self, html):
+        """解析HTML为BeautifulSoup对象，同一份HTML只解析一次"""
+        # 先读到局部变量再判断，其他线程可能同时替换缓存
+        cached = self._soup_cache
+        if cached is not None and cached[0] is html:
+            return cached[1]
+        soup = BeautifulSoup(html, HTML_PARSER)
+        self._soup_cache = (html, soup)
+        return soup
+
+    def extract_with_trafilatura(self, html, url, soup=None):
         """使用Trafilatura提取内容"""
         try:
-            # 提取为JSON格式，包含更多信息
-            result_json = trafilatura.extract(
-                html, 
-                include_links=False, 
-                include_images=True, 
-                include_tables=False, 
-                output_format='json',
-                url=url
+            # 直接取回Python对象形式的结果（包含元数据），省去JSON序列化再解析
+            data = trafilatura.bare_extraction(
+                html,
+                url=url,
+                include_links=False,
+                include_images=True,
+                include_tables=False,
+                with_metadata=True
             )
 
-            if result_json:
-                data = json.loads(result_json)
+            if data:
+                # 新版trafilatura返回Document对象
+                if not isinstance(data, dict):
+                    data = data.as_dict()
                 
                 # 提取带图片标记的内容和图片信息
-                content_with_markers, images = self.extract_content_with_image_markers(html, url)
+                content_with_markers, images = self.extract_content_with_image_markers(html, url, soup=soup)
                 
                 # 如果content_with_markers为空，使用trafilatura提取的内容
                 content = content_with_markers if content_with_markers else data.get('text', '')
@@ -108,7 +395,7 @@ class UniversalWebExtractor:
                     'content': content,
                     'images': images,
                     'source': 'trafilatura',
-                    'excerpt': data.get('excerpt', ''),
+                    'excerpt': data.get('description', ''),
                     'author': data.get('author', ''),
                     'date': data.get('date', '')
                 }
@@ -116,7 +403,17 @@ class UniversalWebExtractor:
                 # 如果trafilatura没有提取到标题，尝试直接从HTML中提取
                 if not result['title']:
                     try:
-                        soup = BeautifulSoup(html, 'html.parser')
+                        snapshot = self._snapshot_for(html)
+                        if snapshot and snapshot.get('title'):
+                            result['title'] = snapshot['title'].strip()
+                            return result
+                        # 先用正则直接匹配<title>，匹配不到再查解析树
+                        match = _TITLE_RE.search(html)
+                        if match and match.group(1).strip():
+                            result['title'] = unescape(match.group(1)).strip()
+                            return result
+                        if soup is None:
+                            soup = self._parse(html)
                         title_tag = soup.find('title')
                         if title_tag and title_tag.text:
                             result['title'] = title_tag.text.strip()
@@ -130,7 +427,7 @@ class UniversalWebExtractor:
 
         return None
 
-    def extract_with_readability(self, html, url):
+    def extract_with_readability(self, html, url, soup=None):
         """使用Readability备用方案提取内容"""
         try:
             doc = Document(html)
@@ -138,14 +435,14 @@ class UniversalWebExtractor:
             content_html = doc.summary()
 
             # 提取带图片标记的内容和图片信息
-            content_with_markers, images = self.extract_content_with_image_markers(html, url)
+            content_with_markers, images = self.extract_content_with_image_markers(html, url, soup=soup)
             
             # 如果content_with_markers为空，使用readability提取的内容
             if content_with_markers:
                 content_text = content_with_markers
             else:
                 # 清理HTML标签，获取纯文本
-                soup = BeautifulSoup(content_html, 'html.parser')
+                soup = BeautifulSoup(content_html, HTML_PARSER)
                 content_text = soup.get_text(separator='\n', strip=True)
 
             return {
@@ -161,200 +458,139 @@ class UniversalWebExtractor:
             logger.warning(f"Readability提取失败: {e}")
             return None
 
-    def extract_images_from_content(self, html, base_url):
-        """从HTML正文内容中提取图片"""
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            images = []
-            
+    def _find_content_area(self, soup):
+        """定位正文区域，找不到时依次退回到body和整个文档"""
+        for selector in CONTENT_SELECTOR_GROUPS:
+            content_area = _compiled_selector(selector).select_one(soup)
+            if content_area:
+                return content_area
+        return soup.find('body') or soup
+
+    def _extract_images_with_lexbor(self, html, base_url):
+        """
+        使用selectolax定位正文区域并提取图片，同时用标记替换图片
+
+        Returns:
+            (带图片标记的正文文本, 图片信息列表)
+        """
+        tree = LexborHTMLParser(html)
+
+        content_area = None
+        for selector in CONTENT_SELECTOR_GROUPS:
+            content_area = tree.css_first(selector)
+            if content_area is not None:
+                break
+
+        # 找不到正文区域时依次退回到body和整个文档
+        if content_area is None:
+            content_area = tree.body or tree.root
+
+        images = []
+        for i, img in enumerate(content_area.css('img')):
+            attrs = img.attributes
+            src = attrs.get('src') or attrs.get('data-src') or attrs.get('data-original')
+            if src:
+                images.append(ImageRef(
+                    url=urljoin(base_url, src),
+                    alt=attrs.get('alt') or '',
+                    width=attrs.get('width'),
+                    height=attrs.get('height'),
+                    position=i,
+                    id=f"img_{i}"
+                ))
+                img.replace_with(f"[IMAGE_PLACEHOLDER_{i}]")
+
+        content_text = content_area.text(separator='\n', strip=True)
+        return content_text, images
+
+    def _extract_all(self, html, base_url, soup=None):
+        """
+        一次遍历正文区域，同时得到带图片标记的正文文本和带位置信息的图片列表，
+        结果按HTML缓存，供各图片提取方法共用
+
+        Returns:
+            (带图片标记的正文文本, ImageRef列表)
+        """
+        cached = self._extract_cache
+        if cached is not None and cached[0] is html and cached[1] == base_url:
+            return cached[2]
+
+        if HAS_SELECTOLAX:
+            result = self._extract_images_with_lexbor(html, base_url)
+        else:
+            if soup is None:
+                soup = self._parse(html)
+
             # 首先尝试获取正文区域，如果无法确定正文区域，则提取所有图片
-            content_area = None
-            
-            # 尝试多种方式定位正文区域
-            content_selectors = [
-                'article',
-                '.content', 
-                '.article-content',
-                '.post-content',
-                '.entry-content',
-                '[class*="content"]',
-                '[class*="article"]',
-                'main'
-            ]
-            
-            for selector in content_selectors:
-                content_area = soup.select_one(selector)
-                if content_area:
-                    break
-            
-            # 如果找不到特定的内容区域，使用整个body
-            if not content_area:
-                content_area = soup.find('body')
-            
-            # 如果连body都找不到，就使用整个soup
-            if not content_area:
-                content_area = soup
-            
-            # 从正文区域提取图片
-            for img in content_area.find_all('img'):
+            content_area = self._find_content_area(soup)
+
+            # 复制正文节点用于处理，避免修改共享的解析树，也无需重新解析
+            content_copy = copy.copy(content_area)
+
+            images = []
+            for i, img in enumerate(content_copy.find_all('img')):
                 src = img.get('src') or img.get('data-src') or img.get('data-original')
                 if src:
-                    # 处理相对路径
-                    full_url = urljoin(base_url, src)
-                    alt = img.get('alt', '')
-
-                    images.append({
-                        'url': full_url,
-                        'alt': alt,
-                        'width': img.get('width'),
-                        'height': img.get('height')
-                    })
-
-            return images
+                    images.append(ImageRef(
+                        url=urljoin(base_url, src),
+                        alt=img.get('alt', ''),
+                        width=img.get('width'),
+                        height=img.get('height'),
+                        position=i,
+                        id=f"img_{i}"
+                    ))
+
+                    # 用标记替换图片
+                    marker = soup.new_tag('span')
+                    marker.string = f"[IMAGE_PLACEHOLDER_{i}]"
+                    img.replace_with(marker)
+
+            # 获取处理后的内容文本
+            result = (content_copy.get_text(separator='\n', strip=True), images)
+
+        self._extract_cache = (html, base_url, result)
+        return result
+
+    def extract_images_from_content(self, html, base_url, soup=None):
+        """从HTML正文内容中提取图片"""
+        try:
+            # Selenium路径上直接使用浏览器中已取回的图片信息
+            snapshot = self._snapshot_for(html)
+            images = snapshot['imgs'] if snapshot is not None else self._extract_all(html, base_url, soup=soup)[1]
+            return [img.as_dict(IMAGE_FIELDS) for img in images]
         except Exception as e:
             logger.error(f"正文图片提取失败: {e}")
             return []
 
-    def extract_images_from_content_with_positions(self, html, base_url):
+    def extract_images_from_content_with_positions(self, html, base_url, soup=None):
         """
         从HTML正文内容中提取图片，并记录它们在正文中的位置信息
         返回包含图片信息和位置索引的列表
         """
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 首先尝试获取正文区域，如果无法确定正文区域，则提取所有图片
-            content_area = None
-            
-            # 尝试多种方式定位正文区域
-            content_selectors = [
-                'article',
-                '.content', 
-                '.article-content',
-                '.post-content',
-                '.entry-content',
-                '[class*="content"]',
-                '[class*="article"]',
-                'main'
-            ]
-            
-            for selector in content_selectors:
-                content_area = soup.select_one(selector)
-                if content_area:
-                    break
-            
-            # 如果找不到特定的内容区域，使用整个body
-            if not content_area:
-                content_area = soup.find('body')
-            
-            # 如果连body都找不到，就使用整个soup
-            if not content_area:
-                content_area = soup
-                
-            # 查找正文区域中的所有图片
-            images_with_positions = []
-            
-            if content_area:
-                # 为每个图片创建一个唯一的标识符
-                img_elements = content_area.find_all('img')
-                for i, img in enumerate(img_elements):
-                    src = img.get('src') or img.get('data-src') or img.get('data-original')
-                    if src:
-                        # 处理相对路径
-                        full_url = urljoin(base_url, src)
-                        alt = img.get('alt', '')
-                        
-                        # 获取图片在HTML中的位置信息
-                        images_with_positions.append({
-                            'url': full_url,
-                            'alt': alt,
-                            'width': img.get('width'),
-                            'height': img.get('height'),
-                            'position': i,
-                            'id': f"img_{i}"
-                        })
-                    
-            return images_with_positions
+            snapshot = self._snapshot_for(html)
+            images = snapshot['imgs'] if snapshot is not None else self._extract_all(html, base_url, soup=soup)[1]
+            return [img.as_dict(IMAGE_POSITION_FIELDS) for img in images]
         except Exception as e:
             logger.error(f"正文图片提取失败: {e}")
             return []
 
-    def extract_content_with_image_markers(self, html, base_url):
+    def extract_content_with_image_markers(self, html, base_url, soup=None):
         """
         提取正文内容，并在图片位置插入标记，以便后续在Word/PDF中正确插入图片
         """
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 首先尝试获取正文区域
-            content_area = None
-            
-            # 尝试多种方式定位正文区域
-            content_selectors = [
-                'article',
-                '.content', 
-                '.article-content',
-                '.post-content',
-                '.entry-content',
-                '[class*="content"]',
-                '[class*="article"]',
-                'main'
-            ]
-            
-            for selector in content_selectors:
-                content_area = soup.select_one(selector)
-                if content_area:
-                    break
-            
-            # 如果找不到特定的内容区域，使用整个body
-            if not content_area:
-                content_area = soup.find('body')
-            
-            # 如果连body都找不到，就使用整个soup
-            if not content_area:
-                content_area = soup
-                
-            # 创建内容副本用于处理
-            content_copy = BeautifulSoup(str(content_area), 'html.parser') if content_area else BeautifulSoup(str(soup), 'html.parser')
-                
-            # 为每个图片添加标记
-            img_elements = content_copy.find_all('img')
-            images = []
-            
-            for i, img in enumerate(img_elements):
-                src = img.get('src') or img.get('data-src') or img.get('data-original')
-                if src:
-                    # 处理相对路径
-                    full_url = urljoin(base_url, src)
-                    alt = img.get('alt', '')
-                    
-                    # 保存图片信息
-                    image_info = {
-                        'url': full_url,
-                        'alt': alt,
-                        'width': img.get('width'),
-                        'height': img.get('height'),
-                        'id': f"img_{i}"
-                    }
-                    images.append(image_info)
-                    
-                    # 用标记替换图片
-                    marker = content_copy.new_tag('span')
-                    marker.string = f"[IMAGE_PLACEHOLDER_{i}]"
-                    img.replace_with(marker)
-            
-            # 获取处理后的内容文本
-            content_text = content_copy.get_text(separator='\n', strip=True)
-            
-            return content_text, images
+            content_text, images = self._extract_all(html, base_url, soup=soup)
+            return content_text, [img.as_dict(IMAGE_MARKER_FIELDS) for img in images]
         except Exception as e:
             logger.error(f"提取带图片标记的内容失败: {e}")
             return "", []
 
-    def extract_publish_time(self, html):
+    def extract_publish_time(self, html, soup=None):
         """从HTML中提取发布时间，特别针对中国家电网的页面结构"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            if soup is None:
+                soup = BeautifulSoup(html, HTML_PARSER, parse_only=PUBLISH_TIME_STRAINER)
             
             # 查找class为info的div元素
             info_div = soup.find('div', class_='info')
@@ -363,32 +599,21 @@ class UniversalWebExtractor:
                 text = info_div.get_text(strip=True)
                 
                 # 使用正则表达式匹配日期时间格式 (2025-09-21 06:05)
-                date_pattern = r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}'
-                match = re.search(date_pattern, text)
+                match = _DATE_TIME_RE.search(text)
                 if match:
                     return match.group()
             
             # 如果没有找到class为info的div，尝试其他常见的发布时间位置
-            other_selectors = [
-                '.time',
-                '.pubtime',
-                '.release-time',
-                'span.time',
-                'meta[name="pubdate"]',
-                'meta[property="article:published_time"]'
-            ]
-            
-            for selector in other_selectors:
-                elements = soup.select(selector)
-                if elements:
+            for selector in PUBLISH_TIME_SELECTORS:
+                element = _compiled_selector(selector).select_one(soup)
+                if element:
                     if selector.startswith('meta'):
-                        content = elements[0].get('content', '')
+                        content = element.get('content', '')
                         if content:
                             return content
                     else:
-                        text = elements[0].get_text(strip=True)
-                        date_pattern = r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}'
-                        match = re.search(date_pattern, text)
+                        text = element.get_text(strip=True)
+                        match = _DATE_TIME_RE.search(text)
                         if match:
                             return match.group()
         except Exception as e:
@@ -401,9 +626,8 @@ class UniversalWebExtractor:
         if not text:
             return ""
 
-        # 移除多余的空行和空白字符
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        text = re.sub(r'[ \t]+', ' ', text)
+        # 移除多余的空行和空白字符（一次扫描同时处理两种情况）
+        text = _WHITESPACE_RE.sub(lambda m: '\n\n' if m.group(1) else ' ', text)
         text = text.strip()
 
         return text
@@ -412,18 +636,59 @@ class UniversalWebExtractor:
         """智能提取网页内容"""
         logger.info(f"开始提取: {url}")
 
-        # 获取页面HTML
+        if self.use_selenium:
+            # 页面加载和页面快照的使用都依赖共享的浏览器实例，整个提取过程持有锁
+            with self._selenium_lock:
+                return self._fetch_and_extract(url)
+        return self._fetch_and_extract(url)
+
+    def _fetch_and_extract(self, url):
+        """获取页面HTML并提取内容"""
         html = self.get_page_content(url)
         if not html:
             return {'error': '无法获取页面内容'}
 
+        return self.extract_from_html(html, url)
+
+    async def fetch_async(self, session, url):
+        """使用aiohttp异步获取页面内容"""
+        # 压缩格式交给aiohttp自行协商，其余请求头与同步会话保持一致
+        headers = {k: v for k, v in self.session.headers.items() if k != 'Accept-Encoding'}
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            body = await response.read()
+            encoding = response.get_encoding()
+        return body.decode(encoding, errors='replace')
+
+    async def smart_extract_async(self, url, session):
+        """异步智能提取网页内容，网络请求异步进行，解析提取放到线程池中执行"""
+        loop = asyncio.get_running_loop()
+        if self.use_selenium:
+            return await loop.run_in_executor(None, self.smart_extract, url)
+
+        logger.info(f"开始提取: {url}")
+        try:
+            html = await self.fetch_async(session, url)
+        except Exception as e:
+            logger.error(f"获取页面内容失败: {e}")
+            html = None
+        if not html:
+            return {'error': '无法获取页面内容'}
+
+        return await loop.run_in_executor(None, self.extract_from_html, html, url)
+
+    def extract_from_html(self, html, url):
+        """从已获取的HTML中提取内容"""
+        # 只解析一次HTML，后续各提取步骤共用
+        soup = self._parse(html)
+
         # 首先尝试使用trafilatura
-        result = self.extract_with_trafilatura(html, url)
+        result = self.extract_with_trafilatura(html, url, soup=soup)
 
         # 如果trafilatura失败或内容太短，使用readability
         if not result or len(result.get('content', '')) < 100:
             logger.info("Trafilatura效果不佳，尝试Readability")
-            result = self.extract_with_readability(html, url)
+            result = self.extract_with_readability(html, url, soup=soup)
 
         if result:
             # 清理内容
@@ -436,7 +701,7 @@ class UniversalWebExtractor:
             result['image_count'] = len(result.get('images', []))
             
             # 专门提取发布时间（优先使用我们自定义的提取方法）
-            publish_time = self.extract_publish_time(html)
+            publish_time = self.extract_publish_time(html, soup=soup)
             if publish_time:
                 result['publish_time'] = publish_time
             # 如果自定义提取方法没有找到，但trafilatura或readability找到了，就使用它们的结果
@@ -457,6 +722,35 @@ class UniversalWebExtractor:
             self.driver.quit()
 
 
+async def extract_urls_async(extractor, urls, concurrency=8):
+    """并发提取多个URL，使用信号量限制同时进行的请求数
+
+    Args:
+        extractor: 网页提取器
+        urls: URL列表
+        concurrency: 最大并发数
+
+    Returns:
+        与urls顺序一致的提取结果列表
+    """
+    # Selenium共用一个浏览器实例，并发提取只会排队等待锁，直接逐个处理
+    if extractor.use_selenium:
+        concurrency = 1
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=30)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def bounded_extract(url):
+            async with semaphore:
+                try:
+                    return await extractor.smart_extract_async(url, session)
+                except Exception as e:
+                    logger.error(f"处理URL {url} 时发生错误: {e}")
+                    return {'url': url, 'error': str(e)}
+
+        return await asyncio.gather(*(bounded_extract(url) for url in urls))
+
+
 # 使用示例
 def main():
     # 测试URL列表
@@ -469,12 +763,20 @@ def main():
     # 创建提取器（对于微博等动态网站使用selenium=True）
     extractor = UniversalWebExtractor(use_selenium=False)
 
-    results = []
-    for url in test_urls:
+    # 并发获取并提取所有页面（未安装aiohttp时逐个提取）
+    if HAS_AIOHTTP:
+        results = asyncio.run(extract_urls_async(extractor, test_urls))
+    else:
+        results = []
+        for url in test_urls:
+            try:
+                results.append(extractor.smart_extract(url))
+            except Exception as e:
+                logger.error(f"处理URL {url} 时发生错误: {e}")
+                results.append({'url': url, 'error': str(e)})
+
+    for i, (url, result) in enumerate(zip(test_urls, results), 1):
         try:
-            result = extractor.smart_extract(url)
-            results.append(result)
-
             # 打印结果摘要
             print(f"\n=== 提取结果: {url} ===")
             if 'error' in result:
@@ -487,15 +789,15 @@ def main():
                 print(f"发布时间: {result.get('publish_time', '未找到')}")
 
             # 保存详细结果到文件
-            with open(f'extraction_result_{len(results)}.json', 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
-
-            # 避免请求过快
-            time.sleep(2)
+            if HAS_ORJSON:
+                with open(f'extraction_result_{i}.json', 'wb') as f:
+                    f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+            else:
+                with open(f'extraction_result_{i}.json', 'w', encoding='utf-8') as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2)
 
         except Exception as e:
             logger.error(f"处理URL {url} 时发生错误: {e}")
-            results.append({'url': url, 'error': str(e)})
 
     # 关闭提取器
     extractor.close()
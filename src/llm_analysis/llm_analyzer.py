@@ -3,38 +3,363 @@
 """
 LLM文档分析器 - 用于分析爬取的文档并生成简要报告
 """
+import asyncio
+import functools
+import hashlib
 import json
 import os
+import random
+import re
 import logging
+import mmap
 import requests
 import time
+from html import escape as html_escape, unescape
+from requests.adapters import HTTPAdapter
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from typing import List, Dict, Optional
+from urllib.parse import urljoin
+from src.llm_analysis.llm_cache import LLMCache, SemanticLLMCache
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 尝试导入orjson（可选），JSON序列化和解析比标准库json快数倍
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# 尝试导入Jinja2（可选），用预编译的模板流式渲染分析报告，没有时直接拼接HTML
+try:
+    import jinja2
+    from markupsafe import escape
+    HAS_JINJA2 = True
+except ImportError:
+    HAS_JINJA2 = False
+
+# 尝试导入aiohttp（可选），用于并发调用LLM接口
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+# 尝试导入tokenizers（可选），按token数而不是字符数截断提交给LLM的内容
+try:
+    from tokenizers import Tokenizer
+    HAS_TOKENIZERS = True
+except ImportError:
+    HAS_TOKENIZERS = False
+
+# 尝试导入中文分词模块（可选），优先使用C加速的jieba_fast
+try:
+    import jieba_fast as jieba
+    import jieba_fast.analyse as jieba_analyse
+    HAS_JIEBA = True
+except ImportError:
+    try:
+        import jieba
+        import jieba.analyse as jieba_analyse
+        HAS_JIEBA = True
+    except ImportError:
+        HAS_JIEBA = False
+
+# 提取关键词时保留的词性：名词、地名、人名、动名词、动词
+KEYWORD_POS = ('n', 'ns', 'nr', 'vn', 'v')
+
+# 批量分析配置
+# 同时进行的LLM请求数，ollama服务端需相应设置OLLAMA_NUM_PARALLEL（如OLLAMA_NUM_PARALLEL=8）才能真正并行
+LLM_CONCURRENCY = 8
+PROCESS_POOL_MIN_DOCS = 64  # 模拟分析时文档数达到该值才使用多进程
+PROCESS_POOL_CHUNKSIZE = 8  # 多进程每次分发的文档数
+
+# 写结果文件和报告时使用的缓冲区大小
+WRITE_BUFFER_SIZE = 1 << 20
+
+# 重试配置：只对超时、连接错误和以下状态码重试，等待时间指数增长并加随机抖动
+RETRY_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+RETRY_MAX_DELAY = 30  # 单次重试等待上限（秒）
+RETRY_JITTER = 1.0  # 随机抖动上限（秒）
+
+# 提交给LLM的内容长度限制：有分词器时按token数截断，否则按字符数截断
+# ollama模型对应的HuggingFace分词器，未列出的模型按字符数截断（可通过tokenizer_name参数指定）
+OLLAMA_TOKENIZERS = {
+    'deepseek-r1:1.5b': 'deepseek-ai/DeepSeek-R1-Distill-Qwen-1.5B',
+    'deepseek-r1:7b': 'deepseek-ai/DeepSeek-R1-Distill-Qwen-7B',
+    'deepseek-r1:8b': 'deepseek-ai/DeepSeek-R1-Distill-Llama-8B',
+    'deepseek-r1:14b': 'deepseek-ai/DeepSeek-R1-Distill-Qwen-14B',
+    'deepseek-r1:32b': 'deepseek-ai/DeepSeek-R1-Distill-Qwen-32B',
+}
+PROMPT_TOKEN_BUDGET = 1500
+PROMPT_CHAR_LIMIT = 2000
+
+# 语义缓存按截断后内容的前若干个字符计算向量
+SEMANTIC_KEY_CHARS = 2000
+
+
+@functools.lru_cache(maxsize=None)
+def _get_tokenizer(name: str):
+    """加载并缓存分词器，加载失败时返回None"""
+    if not HAS_TOKENIZERS:
+        return None
+    try:
+        return Tokenizer.from_pretrained(name)
+    except Exception as e:
+        logger.warning(f"加载分词器失败，将按字符数截断内容: {e}")
+        return None
+
+
+def _in_event_loop() -> bool:
+    """当前线程中是否有正在运行的事件循环"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+# LLM结果缓存配置，修改提示词后需要更新PROMPT_VERSION使旧缓存失效
+PROMPT_VERSION = 'v1'
+LLM_CACHE_TTL = 7 * 24 * 3600  # 缓存有效期（秒）
+
+# LLM响应中的思考过程，以及包裹JSON的Markdown代码块
+_THINK_RE = re.compile(r'<think>.*?</think>', re.S)
+_JSON_FENCE_RE = re.compile(r'^```(?:json)?\s*(.*?)\s*```\s*$', re.S)
+
+# 文本响应解析：部分标题行（可带Markdown标记和冒号，标题后可直接跟内容）、列表项、关键词分隔符
+_SECTION_RE = re.compile(r'^[#*\s]*(摘要|summary|关键词|keywords|关键点|key\s*points)[*\s]*[:：]?\s*(.*)$', re.I)
+_SECTION_FIELDS = {
+    '摘要': 'summary', 'summary': 'summary',
+    '关键词': 'keywords', 'keywords': 'keywords',
+    '关键点': 'key_points', 'keypoints': 'key_points',
+}
+_LIST_ITEM_RE = re.compile(r'^(?:\d+[\.、)]|[-*•])\s*(.+)$')
+_KEYWORD_SEP_RE = re.compile(r'[,，;；、]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 模拟分析时过滤的常见词
+STOP_WORDS = frozenset(('的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这'))
+
+# 报告中允许作为链接的URL协议，其他协议（如javascript:）不生成可点击链接
+_SAFE_URL_RE = re.compile(r'^https?://', re.I)
+
+# 分析报告的样式表，模板和直接拼接HTML时共用
+REPORT_STYLE = """\
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 1200px; margin: 0 auto; padding: 20px; }
+        h1, h2, h3 { color: #2c3e50; }
+        .summary { background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin-bottom: 20px; }
+        .stats-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }
+        .stat-card { background-color: #fff; border: 1px solid #ddd; border-radius: 8px; padding: 20px; text-align: center; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        .stat-value { font-size: 2.5em; font-weight: bold; color: #3498db; margin-bottom: 10px; }
+        .stat-label { color: #7f8c8d; font-size: 1.1em; }
+        table { width: 100%; border-collapse: collapse; margin-bottom: 20px; }
+        th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background-color: #f2f2f2; font-weight: bold; }
+        tr:hover { background-color: #f5f5f5; }
+        .success { color: #27ae60; }
+        .error { color: #e74c3c; }
+        .document-item { margin-bottom: 30px; padding: 20px; border: 1px solid #ddd; border-radius: 8px; }
+        .keywords { color: #3498db; font-weight: bold; }
+        .key-points { margin-top: 10px; padding-left: 20px; }
+"""
+
+# 预先转义报告字段：markupsafe转义的结果为Markup，不会被模板的autoescape重复转义
+_escape = escape if HAS_JINJA2 else (lambda value: html_escape(str(value)))
+
+# 分析报告HTML模板，模块加载时编译一次，渲染时自动转义用户字段
+ANALYSIS_REPORT_TEMPLATE = None
+if HAS_JINJA2:
+    ANALYSIS_REPORT_TEMPLATE = jinja2.Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True).from_string("""
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>文档分析报告</title>
+    <style>
+{{ style|safe }}    </style>
+</head>
+<body>
+    <h1>文档分析报告</h1>
+    
+    <div class="summary">
+        <h2>总体统计</h2>
+        <div class="stats-grid">
+            <div class="stat-card">
+                <div class="stat-value">{{ total_docs }}</div>
+                <div class="stat-label">总文档数</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value success">{{ success_docs }}</div>
+                <div class="stat-label">成功分析</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value error">{{ failed_docs }}</div>
+                <div class="stat-label">分析失败</div>
+            </div>
+        </div>
+    </div>
+    
+    <h2>文档分析详情</h2>
+    {% for row in rows %}
+    <div class="document-item">
+        <h3>{{ row.title }}</h3>
+        {% if row.error is not none %}
+        <p class="error">错误: {{ row.error }}</p>
+        <p>URL: <a href="{{ row.href }}" target="_blank">{{ row.url }}</a></p>
+        {% else %}
+        <p>发布时间: {{ row.publish_time }}</p>
+        <p>URL: <a href="{{ row.href }}" target="_blank">{{ row.url }}</a></p>
+        <p>摘要: {{ row.summary }}</p>
+        <p>关键词: {% for kw in row.keywords %}<span class="keywords">{{ kw }}</span>{{ ', ' if not loop.last }}{% endfor %}</p>
+        {% if row.key_points %}
+        <div class="key-points"><p>关键点:</p><ul>{% for point in row.key_points %}<li>{{ point }}</li>{% endfor %}</ul></div>
+        {% endif %}
+        {% endif %}
+    </div>
+    {% endfor %}
+</body>
+</html>
+""")
+
+
+def _report_row(result: Dict) -> Dict:
+    """预先转义一条分析结果中要展示的字段，模板中不再逐个调用result.get
+
+    转义后的Markup不会被模板的autoescape重复转义。
+    """
+    url = _escape(result.get('url', ''))
+    return {
+        'title': _escape(result.get('title', '未命名文档')),
+        'error': _escape(result['error']) if 'error' in result else None,
+        'url': url,
+        'href': url if _SAFE_URL_RE.match(url) else '#',
+        'publish_time': _escape(result.get('publish_time', '未知')),
+        'summary': _escape(result.get('summary', '')),
+        'keywords': [_escape(kw) for kw in result.get('keywords', [])],
+        'key_points': [_escape(point) for point in result.get('key_points', [])],
+    }
+
+
+def _write_report_html(f, total_docs: int, success_docs: int, rows: List[Dict]):
+    """没有Jinja2时直接拼接分析报告HTML，结构与ANALYSIS_REPORT_TEMPLATE相同，字段已由_report_row转义"""
+    f.write(f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>文档分析报告</title>
+    <style>
+{REPORT_STYLE}    </style>
+</head>
+<body>
+    <h1>文档分析报告</h1>
+    
+    <div class="summary">
+        <h2>总体统计</h2>
+        <div class="stats-grid">
+            <div class="stat-card">
+                <div class="stat-value">{total_docs}</div>
+                <div class="stat-label">总文档数</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value success">{success_docs}</div>
+                <div class="stat-label">成功分析</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value error">{total_docs - success_docs}</div>
+                <div class="stat-label">分析失败</div>
+            </div>
+        </div>
+    </div>
+    
+    <h2>文档分析详情</h2>
+""")
+    for row in rows:
+        link = f'<p>URL: <a href="{row["href"]}" target="_blank">{row["url"]}</a></p>'
+        if row['error'] is not None:
+            details = f'<p class="error">错误: {row["error"]}</p>\n        {link}'
+        else:
+            keywords = ', '.join(f'<span class="keywords">{kw}</span>' for kw in row['keywords'])
+            details = (f"<p>发布时间: {row['publish_time']}</p>\n        {link}\n"
+                       f"        <p>摘要: {row['summary']}</p>\n        <p>关键词: {keywords}</p>")
+            if row['key_points']:
+                points = ''.join(f'<li>{point}</li>' for point in row['key_points'])
+                details += f'\n        <div class="key-points"><p>关键点:</p><ul>{points}</ul></div>'
+        f.write(f'    <div class="document-item">\n        <h3>{row["title"]}</h3>\n        {details}\n    </div>\n')
+    f.write('</body>\n</html>\n')
+
+
 class LLMAnalyzer:
     """LLM文档分析器类"""
     
-    def __init__(self, use_real_llm: bool = True, ollama_url: str = "http://localhost:11434/api/generate", model: str = "deepseek-r1:7b"):
+    def __init__(self, use_real_llm: bool = True, ollama_url: str = "http://localhost:11434/api/generate", model: str = "deepseek-r1:7b",
+                 use_cache: bool = True, use_semantic_cache: bool = False, docs_per_request: int = 1,
+                 tokenizer_name: Optional[str] = None):
         """初始化分析器
         
         Args:
             use_real_llm: 是否使用真实的LLM模型
             ollama_url: ollama API的URL地址
             model: 使用的模型名称
+            use_cache: 是否缓存LLM分析结果，相同内容的文档不再重复调用模型
+            use_semantic_cache: 是否启用语义近似缓存（需要ollama中已有向量模型，如nomic-embed-text）
+            docs_per_request: 每次LLM请求分析的文档数，大于1时将多篇短文档合并到一个提示词中
+            tokenizer_name: 按token数截断内容使用的HuggingFace分词器，默认根据model从OLLAMA_TOKENIZERS中选择
         """
         # 这里初始化LLM API客户端
         self.use_real_llm = use_real_llm
         self.ollama_url = ollama_url
         self.model = model
         self.max_retries = 3
-        self.retry_delay = 5  # 增加重试间隔时间到5秒
+        self.retry_delay = 2  # 首次重试的基础间隔（秒），之后按指数退避
         self.timeout = 60  # 增加超时时间到60秒
+        self.docs_per_request = max(1, docs_per_request)
         
-        # 如果启用真实LLM，测试连接
-        if self.use_real_llm:
+        # 分词器在第一次截断内容时才加载（需要从HuggingFace下载），只读取配置的工具不承担加载耗时
+        self.tokenizer_name = tokenizer_name or OLLAMA_TOKENIZERS.get(model)
+        
+        # 复用连接的HTTP会话，避免每次调用都重新建立TCP连接（重试由_call_llm_api自行处理）
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
+        
+        # LLM结果缓存，仅在调用真实LLM时使用
+        self.cache = None
+        if self.use_real_llm and use_cache:
+            try:
+                self.cache = LLMCache(ttl=LLM_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"初始化LLM缓存失败，将不使用缓存: {e}")
+        
+        # 语义近似缓存，复用内容几乎相同的文档（如转载文章）的分析结果
+        self.semantic_cache = None
+        if self.use_real_llm and use_semantic_cache:
+            self.semantic_cache = SemanticLLMCache(urljoin(self.ollama_url, '/api/embed'), session=self.session, timeout=self.timeout)
+        
+        # 模拟分析使用jieba提取关键词，提前加载词典以免首个文档承担加载耗时
+        if not self.use_real_llm and HAS_JIEBA:
+            jieba.initialize()
+        
+        # 连接测试本身就是一次模型调用，推迟到第一次真正调用LLM时进行
+        self._connection_tested = False
+    
+    def close(self):
+        """关闭HTTP会话和LLM缓存"""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+    
+    def _ensure_connection_tested(self):
+        """第一次真正调用LLM前测试一次与ollama服务的连接（仅用于提示，不影响后续调用）"""
+        if not self._connection_tested:
+            self._connection_tested = True
             self._test_ollama_connection()
     
     def _test_ollama_connection(self):
@@ -42,7 +367,7 @@ class LLMAnalyzer:
         try:
             logger.info(f"测试连接到ollama服务: {self.ollama_url}，使用模型: {self.model}")
             # 发送一个简单的请求测试连接
-            response = requests.post(
+            response = self.session.post(
                 self.ollama_url,
                 json={"model": self.model, "prompt": "hello", "stream": False},
                 timeout=self.timeout
@@ -70,15 +395,14 @@ class LLMAnalyzer:
         Returns:
             分析结果字典
         """
-        # 构建提示词
-        prompt = f"""请分析以下文档内容，并按照要求生成分析结果：
-                1. 生成2-4句话的摘要
-                2. 提取3个关键词
-                3. 列出3-5个关键点
-                返回的数据格式为JSON，请返回JSON格式数据。
-                摘要放在summary字段，关键词放在keywords字段，关键点放在key_points字段。
-                文档内容：
-                {content[:2000]}..."""
+        content = self._truncate_content(content)
+        cache_key = self._cache_key(content)
+        cached = self._get_cached_result(cache_key, content)
+        if cached is not None:
+            return cached
+        
+        self._ensure_connection_tested()
+        payload = self._build_payload(content)
         
         logger.info(f"准备调用LLM API，内容长度: {len(content)}字符")
         # 调用ollama API
@@ -86,80 +410,296 @@ class LLMAnalyzer:
             try:
                 logger.info(f"第{attempt+1}/{self.max_retries}次尝试调用LLM API...")
                 start_time = time.time()
-                response = requests.post(
+                with self.session.post(
                     self.ollama_url,
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.7,
-                            "max_tokens": 500
-                        }
-                    },
-                    timeout=self.timeout
-                )
-                end_time = time.time()
-                logger.info(f"API调用完成，耗时: {end_time - start_time:.2f}秒")
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"API调用成功，响应长度: {len(result.get('response', ''))}字符")
-                    return self._parse_llm_response(result.get("response", ""))
-                else:
+                    json=payload,
+                    timeout=self.timeout,
+                    stream=True
+                ) as response:
+                    if response.status_code == 200:
+                        # 逐行读取流式响应，边接收边拼接生成的文本
+                        parts = []
+                        for line in response.iter_lines():
+                            if line and self._read_stream_chunk(line, parts):
+                                break
+                        text = ''.join(parts)
+                        end_time = time.time()
+                        logger.info(f"API调用完成，耗时: {end_time - start_time:.2f}秒")
+                        logger.info(f"API调用成功，响应长度: {len(text)}字符")
+                        return self._cache_result(cache_key, content, self._parse_llm_response(text))
                     logger.error(f"LLM API调用失败，状态码: {response.status_code}")
                     logger.error(f"响应内容: {response.text}")
-                    if attempt < self.max_retries - 1:
-                        logger.info(f"{self.retry_delay}秒后重试...")
-                        time.sleep(self.retry_delay)
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        break
             except requests.Timeout:
                 logger.error(f"LLM API调用超时 (当前设置: {self.timeout}秒)")
-                if attempt < self.max_retries - 1:
-                    logger.info(f"{self.retry_delay}秒后重试...")
-                    time.sleep(self.retry_delay)
             except requests.ConnectionError:
                 logger.error(f"无法连接到ollama服务，请检查服务是否正在运行")
-                if attempt < self.max_retries - 1:
-                    logger.info(f"{self.retry_delay}秒后重试...")
-                    time.sleep(self.retry_delay)
             except Exception as e:
                 logger.error(f"LLM API调用异常: {type(e).__name__}: {e}")
-                if attempt < self.max_retries - 1:
-                    logger.info(f"{self.retry_delay}秒后重试...")
-                    time.sleep(self.retry_delay)
+                break
+            
+            if attempt < self.max_retries - 1:
+                delay = self._backoff_delay(attempt)
+                logger.info(f"{delay:.1f}秒后重试...")
+                time.sleep(delay)
         
         # 如果所有重试都失败，返回空结果
-        logger.error(f"所有{self.max_retries}次LLM API调用尝试都失败了")
+        logger.error(f"LLM API调用失败，共尝试{attempt + 1}次")
+        self._discard_semantic(content)
         return {
             "summary": "",
             "keywords": [],
             "key_points": []
         }
     
-    def _remove_thinking_process(self, response):
+    async def _acall_llm_api(self, session, content: str) -> Dict:
+        """异步调用LLM API进行文档分析，重试策略与_call_llm_api相同
+        
+        Args:
+            session: aiohttp会话
+            content: 文档内容
+            
+        Returns:
+            分析结果字典
+        """
+        content = self._truncate_content(content)
+        cache_key = self._cache_key(content)
+        # 缓存读写涉及SQLite和向量接口的同步调用，放到线程中执行，不阻塞其他并发请求
+        cached = await asyncio.to_thread(self._get_cached_result, cache_key, content)
+        if cached is not None:
+            return cached
+        
+        if not self._connection_tested:
+            self._connection_tested = True
+            await asyncio.to_thread(self._test_ollama_connection)
+        payload = self._build_payload(content)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        
+        for attempt in range(self.max_retries):
+            try:
+                start_time = time.time()
+                async with session.post(self.ollama_url, json=payload, timeout=timeout) as response:
+                    if response.status == 200:
+                        parts = []
+                        async for line in response.content:
+                            if line.strip() and self._read_stream_chunk(line, parts):
+                                break
+                        logger.info(f"API调用完成，耗时: {time.time() - start_time:.2f}秒")
+                        result = self._parse_llm_response(''.join(parts))
+                        return await asyncio.to_thread(self._cache_result, cache_key, content, result)
+                    logger.error(f"LLM API调用失败，状态码: {response.status}")
+                    logger.error(f"响应内容: {await response.text()}")
+                    if response.status not in RETRY_STATUS_CODES:
+                        break
+            except asyncio.TimeoutError:
+                logger.error(f"LLM API调用超时 (当前设置: {self.timeout}秒)")
+            except aiohttp.ClientConnectionError:
+                logger.error(f"无法连接到ollama服务，请检查服务是否正在运行")
+            except Exception as e:
+                logger.error(f"LLM API调用异常: {type(e).__name__}: {e}")
+                break
+            
+            if attempt < self.max_retries - 1:
+                delay = self._backoff_delay(attempt)
+                logger.info(f"{delay:.1f}秒后重试...")
+                await asyncio.sleep(delay)
+        
+        # 如果所有重试都失败，返回空结果
+        logger.error(f"LLM API调用失败，共尝试{attempt + 1}次")
+        self._discard_semantic(content)
+        return {
+            "summary": "",
+            "keywords": [],
+            "key_points": []
+        }
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """第attempt次失败后的重试等待时间：指数退避并加随机抖动，避免并发请求同时重试"""
+        return min(RETRY_MAX_DELAY, self.retry_delay * (2 ** attempt)) + random.uniform(0, RETRY_JITTER)
+    
+    def _cache_key(self, content: str) -> str:
+        """根据模型、提示词版本和提交给模型的内容计算缓存键"""
+        return hashlib.sha256(f"{self.model}|{PROMPT_VERSION}|{content}".encode('utf-8')).hexdigest()
+    
+    def _get_cached_result(self, cache_key: str, content: str) -> Optional[Dict]:
+        """读取缓存的分析结果，先按内容哈希精确匹配，再按语义相似度匹配"""
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("命中LLM结果缓存，跳过API调用")
+                return cached
+        if self.semantic_cache is not None:
+            cached = self.semantic_cache.get(content[:SEMANTIC_KEY_CHARS])
+            if cached is not None:
+                logger.info("命中语义近似缓存，跳过API调用")
+                return cached
+        return None
+    
+    def _cache_result(self, cache_key: str, content: str, result: Dict) -> Dict:
+        """缓存有内容的分析结果并原样返回"""
+        if result.get('summary') or result.get('keywords') or result.get('key_points'):
+            if self.cache is not None:
+                self.cache.set(cache_key, result)
+            if self.semantic_cache is not None:
+                self.semantic_cache.set(content[:SEMANTIC_KEY_CHARS], result)
+        else:
+            self._discard_semantic(content)
+        return result
+    
+    def _discard_semantic(self, content: str):
+        """分析失败时丢弃语义缓存为该内容暂存的向量"""
+        if self.semantic_cache is not None:
+            self.semantic_cache.discard(content[:SEMANTIC_KEY_CHARS])
+    
+    def _tokenizer(self):
+        """当前模型对应的分词器，没有配置或加载失败时返回None"""
+        return _get_tokenizer(self.tokenizer_name) if self.tokenizer_name else None
+    
+    def _truncate_content(self, content: str) -> str:
+        """截断提交给LLM的内容，使不同文档的提示词长度稳定在预算内"""
+        tokenizer = self._tokenizer()
+        if tokenizer is None:
+            return content[:PROMPT_CHAR_LIMIT]
+        
+        ids = tokenizer.encode(content, add_special_tokens=False).ids
+        if len(ids) <= PROMPT_TOKEN_BUDGET:
+            return content
+        return tokenizer.decode(ids[:PROMPT_TOKEN_BUDGET])
+    
+    def _prefetch_semantic(self, documents: List[Dict]):
+        """一次请求批量计算所有文档的向量，供语义缓存使用
+        
+        预先计算的文本与_get_cached_result中查找时使用的文本一致（按token截断后的内容）
         """
-        移除LLM响应中的思考过程内容
+        self.semantic_cache.prefetch([
+            self._truncate_content(doc['content'])[:SEMANTIC_KEY_CHARS] for doc in documents if doc.get('content')
+        ])
+    
+    def _build_payload(self, content: str) -> Dict:
+        """构建调用ollama generate接口的请求体
+        
+        固定的指令放在前面、文档内容放在最后，使ollama能在不同文档间复用提示词前缀的KV缓存
         """
-        # 移除思考过程标记（<think>...</think>格式）
-        if '<think>' in response and '</think>' in response:
-            # 找到第一个和最后一个思考过程标记
-            start = response.find('<think>') + len('<think>')
-            end = response.find('</think>')
-            # 保留标记外的内容
-            response = response[:response.find('<think>')] + response[end + len('</think>'):]
-        
-        # 同时保留对旧格式的支持（以防万一）
-        if '</think>' in response and '</think>' in response[response.find('</think>')+3:]:
-            start = response.find('</think>') + 3
-            end = response.rfind('</think>')
-            response = response[:response.find('</think>')] + response[end+3:]
-        
-        # 处理其他可能的思考过程格式
-        if '思考过程' in response or 'thought' in response.lower():
-            # 可以添加更多过滤逻辑
-            pass
+        prompt = f"""请分析以下文档内容，并按照要求生成分析结果：
+                1. 生成2-4句话的摘要
+                2. 提取3个关键词
+                3. 列出3-5个关键点
+                返回的数据格式为JSON，请返回JSON格式数据。
+                摘要放在summary字段，关键词放在keywords字段，关键点放在key_points字段。
+                文档内容：
+                {content}..."""
+        
+        return self._build_request(prompt, stream=True)
+    
+    def _build_batch_payload(self, contents: List[str]) -> Dict:
+        """构建一次分析多篇文档的请求体，要求模型按文档顺序返回JSON数组"""
+        documents_text = '\n\n'.join(f"文档{i}：\n{content}" for i, content in enumerate(contents, 1))
+        prompt = f"""请分别分析以下{len(contents)}篇文档，每篇文档按照要求生成分析结果：
+                1. 生成2-4句话的摘要
+                2. 提取3个关键词
+                3. 列出3-5个关键点
+                返回的数据格式为JSON数组，按文档顺序每篇文档对应数组中的一个对象，请只返回JSON数组。
+                每个对象中摘要放在summary字段，关键词放在keywords字段，关键点放在key_points字段。
+                {documents_text}"""
+        
+        return self._build_request(prompt)
+    
+    def _build_request(self, prompt: str, stream: bool = False) -> Dict:
+        """根据提示词构建ollama generate接口的请求体"""
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": 0.7,
+                "max_tokens": 500
+            }
+        }
+    
+    def _read_stream_chunk(self, line: bytes, parts: List[str]) -> bool:
+        """解析流式响应中的一行（一个JSON对象），将生成的文本追加到parts
+        
+        Returns:
+            生成是否已经结束
+        """
+        chunk = orjson.loads(line) if HAS_ORJSON else json.loads(line)
+        if 'error' in chunk:
+            raise ValueError(chunk['error'])
+        parts.append(chunk.get('response', ''))
+        return chunk.get('done', False)
+    
+    def _batch_call_llm_api(self, contents: List[str]) -> Optional[List[Dict]]:
+        """在一次LLM请求中分析多篇文档
+        
+        Args:
+            contents: 文档内容列表
             
-        return response.strip()
+        Returns:
+            与contents顺序一致的分析结果列表，请求失败或返回的结果数量不符时返回None
+        """
+        contents = [self._truncate_content(content) for content in contents]
+        cache_keys = [self._cache_key(content) for content in contents]
+        results = [self._get_cached_result(key, content) for key, content in zip(cache_keys, contents)]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        
+        self._ensure_connection_tested()
+        logger.info(f"合并{len(missing)}篇文档调用LLM API...")
+        try:
+            start_time = time.time()
+            response = self.session.post(
+                self.ollama_url,
+                json=self._build_batch_payload([contents[i] for i in missing]),
+                timeout=self.timeout * len(missing)
+            )
+            logger.info(f"API调用完成，耗时: {time.time() - start_time:.2f}秒")
+            if response.status_code != 200:
+                logger.warning(f"合并调用LLM API失败，状态码: {response.status_code}")
+                return None
+            parsed = self._parse_batch_response(response.json().get("response", ""), len(missing))
+        except Exception as e:
+            logger.warning(f"合并调用LLM API异常: {type(e).__name__}: {e}")
+            return None
+        
+        if parsed is None:
+            return None
+        for i, result in zip(missing, parsed):
+            results[i] = self._cache_result(cache_keys[i], contents[i], result)
+        return results
+    
+    def _parse_batch_response(self, response: str, expected: int) -> Optional[List[Dict]]:
+        """解析合并请求返回的JSON数组，格式不符或数量不一致时返回None"""
+        clean_response = self._remove_thinking_process(response)
+        fence = _JSON_FENCE_RE.match(clean_response)
+        json_content = fence.group(1) if fence else clean_response
+        
+        try:
+            data = json.loads(json_content)
+        except json.JSONDecodeError:
+            logger.warning("合并请求的响应不是有效的JSON")
+            return None
+        
+        # 兼容模型把数组包在一个对象里返回的情况，如{"results": [...]}
+        if isinstance(data, dict):
+            data = next((value for value in data.values() if isinstance(value, list)), None)
+        
+        if not isinstance(data, list) or len(data) != expected or not all(isinstance(item, dict) for item in data):
+            logger.warning(f"合并请求返回的结果数量不符，期望{expected}个")
+            return None
+        
+        return [{
+            'summary': item.get('summary', ''),
+            'keywords': item.get('keywords', []),
+            'key_points': item.get('key_points', [])
+        } for item in data]
+    
+    def _remove_thinking_process(self, response):
+        """
+        移除LLM响应中的思考过程内容（<think>...</think>格式）
+        """
+        return _THINK_RE.sub('', response).strip()
 
     def _parse_llm_response(self, response):
         """解析LLM的响应，提取摘要、关键词和关键点"""
@@ -169,14 +709,9 @@ class LLMAnalyzer:
             logger.debug(f"过滤思考过程后的响应: {clean_response}")
             
             # 第二步：移除Markdown代码块标记
-            if clean_response.startswith('```json') and '```' in clean_response:
-                # 找到开始和结束的代码块标记
-                start_marker = '```json'
-                end_marker = '```'
-                start_index = clean_response.find(start_marker) + len(start_marker)
-                end_index = clean_response.rfind(end_marker)
-                # 提取中间的JSON内容
-                json_content = clean_response[start_index:end_index].strip()
+            fence = _JSON_FENCE_RE.match(clean_response)
+            if fence:
+                json_content = fence.group(1)
                 logger.debug(f"移除代码块标记后的JSON内容: {json_content}")
             else:
                 json_content = clean_response
@@ -213,115 +748,59 @@ class LLMAnalyzer:
 
     def _parse_text_response(self, text):
         """当JSON解析失败时，使用文本解析作为备选方案"""
-        # 这里保留原有的文本解析逻辑
         result = {
             "summary": "",
             "keywords": [],
             "key_points": []
         }
         
-        # 这里放入原来的文本解析代码
-        # 简单解析响应，根据常见的格式进行提取
-        lines = text.strip().split('\n')
-        
-        # 重置所有解析状态
-        parsing_summary = False
-        parsing_keywords = False
-        parsing_key_points = False
+        lines = [line.strip() for line in text.strip().split('\n')]
         
-        # 遍历所有行，根据行内容判断当前应该解析的部分
+        # 逐行扫描：遇到部分标题时切换当前解析的部分，标题后同一行的内容也一并处理
+        section = None
         for line in lines:
-            stripped_line = line.strip()
-            
-            # 如果是空行，跳过
-            if not stripped_line:
+            if not line:
                 continue
             
-            # 检查是否是部分标题行，使用更宽松的匹配
-            if ('摘要' in stripped_line or 'Summary' in stripped_line.lower()):
-                parsing_summary = True
-                parsing_keywords = False
-                parsing_key_points = False
-                # 如果标题后面直接跟内容，提取内容
-                if ':' in stripped_line:
-                    summary_content = stripped_line.split(':', 1)[1].strip()
-                    if summary_content:
-                        result["summary"] = summary_content
-                continue
-            elif ('关键词' in stripped_line or 'Keywords' in stripped_line.lower()):
-                parsing_summary = False
-                parsing_keywords = True
-                parsing_key_points = False
-                continue
-            elif ('关键点' in stripped_line or 'Key Points' in stripped_line.lower()):
-                parsing_summary = False
-                parsing_keywords = False
-                parsing_key_points = True
-                continue
+            match = _SECTION_RE.match(line)
+            if match:
+                section = _SECTION_FIELDS[_WHITESPACE_RE.sub('', match.group(1).lower())]
+                line = match.group(2).strip()
+                if not line:
+                    continue
             
-            # 根据当前解析状态处理内容
-            if parsing_summary:
-                # 移除可能的引号和HTML实体
-                cleaned_line = stripped_line.replace('&quot;', '"').replace('&amp;', '&')
-                if result["summary"]:
-                    result["summary"] += ' ' + cleaned_line
-                else:
-                    result["summary"] = cleaned_line
-            elif parsing_keywords:
-                # 处理关键词行，可能包含序号
-                if stripped_line[0].isdigit() and (stripped_line[1] == '.' or stripped_line[1] == '、'):
-                    # 移除序号前缀（如1.、2.、3.等）
-                    keyword = stripped_line.split('.', 1)[1].strip() if '.' in stripped_line else \
-                              stripped_line.split('、', 1)[1].strip()
-                    if keyword and len(result["keywords"]) < 5:
-                        result["keywords"].append(keyword)
-                elif ':' in stripped_line:
-                    # 处理类似"关键词：关键词1，关键词2"的格式
-                    keywords_part = stripped_line.split(':', 1)[1].strip()
-                    # 分割关键词（处理逗号、顿号、分号等分隔符）
-                    for sep in [',', '，', ';', '；']:
-                        if sep in keywords_part:
-                            keywords = [kw.strip() for kw in keywords_part.split(sep)]
-                            for kw in keywords[:5 - len(result["keywords"])]:
-                                if kw:
-                                    result["keywords"].append(kw)
-                            break
-            elif parsing_key_points:
-                # 处理关键点行，可能包含序号
-                if stripped_line[0].isdigit() and (stripped_line[1] == '.' or stripped_line[1] == '、'):
-                    # 移除序号前缀（如1.、2.、3.等）
-                    key_point = stripped_line.split('.', 1)[1].strip() if '.' in stripped_line else \
-                               stripped_line.split('、', 1)[1].strip()
-                    # 移除可能的引号和HTML实体
-                    key_point = key_point.replace('&quot;', '"').replace('&amp;', '&')
-                    if key_point and len(result["key_points"]) < 3:
-                        result["key_points"].append(key_point)
-        
-        # 如果解析后仍然没有数据，尝试使用备选解析方案
+            if section == 'summary':
+                # 移除可能的HTML实体
+                cleaned_line = unescape(line)
+                result["summary"] = f"{result['summary']} {cleaned_line}" if result["summary"] else cleaned_line
+            elif section == 'keywords':
+                # 处理关键词行，可能是带序号的单个关键词，也可能是分隔符分开的多个关键词
+                item = _LIST_ITEM_RE.match(line)
+                keywords = [item.group(1)] if item else _KEYWORD_SEP_RE.split(line)
+                for kw in keywords:
+                    kw = kw.strip()
+                    if kw and len(result["keywords"]) < 5:
+                        result["keywords"].append(kw)
+            elif section == 'key_points':
+                item = _LIST_ITEM_RE.match(line)
+                if item and len(result["key_points"]) < 3:
+                    result["key_points"].append(unescape(item.group(1).strip()))
+        
+        # 如果解析后仍然没有数据，尝试直接从响应中提取有用信息
         if not result["summary"] and not result["keywords"] and not result["key_points"]:
-            # 尝试直接从响应中提取有用信息
             for i, line in enumerate(lines):
-                stripped_line = line.strip().replace('&quot;', '"').replace('&amp;', '&')
-                if not stripped_line:
+                if not line:
                     continue
                 
                 # 如果是第一行且长度适中，可能是摘要
-                if i == 0 and 20 <= len(stripped_line) <= 200:
-                    result["summary"] = stripped_line
-                # 如果包含明显的关键词格式
-                elif ':' in stripped_line and ('关键词' in stripped_line or 'Keywords' in stripped_line.lower()):
-                    keywords_part = stripped_line.split(':', 1)[1].strip()
-                    for sep in [',', '，', ';', '；']:
-                        if sep in keywords_part:
-                            keywords = [kw.strip() for kw in keywords_part.split(sep)]
-                            result["keywords"] = keywords[:5]
-                            break
-                # 如果包含序号列表，可能是关键点
-                elif stripped_line[0].isdigit() and (stripped_line[1] == '.' or stripped_line[1] == '、') and len(stripped_line) > 10:
-                    key_point = stripped_line.split('.', 1)[1].strip() if '.' in stripped_line else \
-                               stripped_line.split('、', 1)[1].strip()
-                    if key_point and len(result["key_points"]) < 3:
-                        result["key_points"].append(key_point)
+                if i == 0 and 20 <= len(line) <= 200:
+                    result["summary"] = unescape(line)
+                    continue
+                
+                # 如果是序号列表，可能是关键点
+                item = _LIST_ITEM_RE.match(line)
+                if item and len(line) > 10 and len(result["key_points"]) < 3:
+                    result["key_points"].append(unescape(item.group(1).strip()))
         
         return result
 
@@ -334,36 +813,15 @@ class LLMAnalyzer:
         Returns:
             包含分析结果的字典
         """
-        logger.info(f"分析文档: {document.get('title', '未命名文档')}")
-        
-        # 提取文档内容
-        title = document.get('title', '')
+        analysis_result = self._new_analysis_result(document)
         content = document.get('content', '')
-        url = document.get('url', '')
-        publish_time = document.get('publish_time', document.get('date', ''))
-        
-        # 生成分析结果
-        analysis_result = {
-            'title': title,
-            'url': url,
-            'publish_time': publish_time,
-            'summary': '',
-            'keywords': [],
-            'sentiment': 'neutral',  # 中性
-            'key_points': []
-        }
-        
         if not content:
-            analysis_result['summary'] = '文档内容为空'
             return analysis_result
         
         # 生成分析结果
         if self.use_real_llm:
             # 调用实际的LLM API
-            llm_result = self._call_llm_api(content)
-            analysis_result['summary'] = llm_result.get('summary', '')
-            analysis_result['keywords'] = llm_result.get('keywords', [])
-            analysis_result['key_points'] = llm_result.get('key_points', [])
+            self._apply_llm_result(analysis_result, self._call_llm_api(content))
         else:
             # 模拟分析结果
             # 从内容提取前100个字符作为摘要
@@ -374,29 +832,58 @@ class LLMAnalyzer:
             
             # 简单提取关键词（实际使用时应该使用更复杂的算法或LLM）
             # 这里仅作为示例
-            common_words = ['的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这']
-            words = content[:500].split()  # 只取前500个字符进行分析
-            keywords_count = {}
-            
-            for word in words:
+            if HAS_JIEBA:
+                # 基于TF-IDF提取中文关键词
+                analysis_result['keywords'] = jieba_analyse.extract_tags(content, topK=5, allowPOS=KEYWORD_POS)
+            else:
+                words = content[:500].split()  # 只取前500个字符进行分析
                 # 过滤掉短词和常见词
-                if len(word) > 2 and word not in common_words:
-                    keywords_count[word] = keywords_count.get(word, 0) + 1
-            
-            # 获取出现频率最高的5个词作为关键词
-            sorted_keywords = sorted(keywords_count.items(), key=lambda x: x[1], reverse=True)
-            analysis_result['keywords'] = [kw for kw, _ in sorted_keywords[:5]]
+                keywords_count = Counter(word for word in words if len(word) > 2 and word not in STOP_WORDS)
+                
+                # 获取出现频率最高的5个词作为关键词
+                analysis_result['keywords'] = [kw for kw, _ in keywords_count.most_common(5)]
             
             # 简单提取关键点
-            lines = content.split('\n')
-            key_points = []
-            for line in lines[:5]:  # 只取前5行
-                if line.strip() and len(line.strip()) > 20:
-                    key_points.append(line.strip())
-            analysis_result['key_points'] = key_points
+            # 只切分出前5行，避免对长文档整体split
+            stripped = (line.strip() for line in content.split('\n', 5)[:5])
+            analysis_result['key_points'] = [line for line in stripped if len(line) > 20]
+        
+        return analysis_result
+    
+    async def _aanalyze_document(self, session, document: Dict) -> Dict:
+        """异步分析单个文档（调用真实LLM）"""
+        analysis_result = self._new_analysis_result(document)
+        content = document.get('content', '')
+        if not content:
+            return analysis_result
         
+        self._apply_llm_result(analysis_result, await self._acall_llm_api(session, content))
         return analysis_result
     
+    def _new_analysis_result(self, document: Dict) -> Dict:
+        """根据文档基本信息创建初始的分析结果"""
+        logger.info(f"分析文档: {document.get('title', '未命名文档')}")
+        
+        analysis_result = {
+            'title': document.get('title', ''),
+            'url': document.get('url', ''),
+            'publish_time': document.get('publish_time', document.get('date', '')),
+            'summary': '',
+            'keywords': [],
+            'sentiment': 'neutral',  # 中性
+            'key_points': []
+        }
+        
+        if not document.get('content', ''):
+            analysis_result['summary'] = '文档内容为空'
+        return analysis_result
+    
+    def _apply_llm_result(self, analysis_result: Dict, llm_result: Dict):
+        """将LLM返回的摘要、关键词和关键点写入分析结果"""
+        analysis_result['summary'] = llm_result.get('summary', '')
+        analysis_result['keywords'] = llm_result.get('keywords', [])
+        analysis_result['key_points'] = llm_result.get('key_points', [])
+    
     def batch_analyze(self, documents: List[Dict]) -> List[Dict]:
         """批量分析文档
         
@@ -407,23 +894,133 @@ class LLMAnalyzer:
             分析结果列表
         """
         logger.info(f"开始批量分析 {len(documents)} 个文档")
-        results = []
         
-        for doc in documents:
-            try:
-                result = self.analyze_document(doc)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"分析文档失败: {e}")
-                # 记录错误但继续处理其他文档
-                results.append({
-                    'title': doc.get('title', '未命名文档'),
-                    'url': doc.get('url', ''),
-                    'error': str(e)
-                })
+        if self.use_real_llm:
+            if self.semantic_cache is not None:
+                self._prefetch_semantic(documents)
+                try:
+                    return self._batch_analyze_llm(documents)
+                finally:
+                    # 命中精确缓存或调用失败的文档不会取走预先计算的向量，批次结束后统一清理
+                    self.semantic_cache.clear_prefetched()
+            return self._batch_analyze_llm(documents)
+        
+        if len(documents) >= PROCESS_POOL_MIN_DOCS:
+            # 模拟分析是CPU密集型，文档较多时使用多进程绕过GIL
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                return list(executor.map(self._analyze_document_safe, documents, chunksize=PROCESS_POOL_CHUNKSIZE))
+        
+        return [self._analyze_document_safe(doc) for doc in documents]
+    
+    def _batch_analyze_llm(self, documents: List[Dict]) -> List[Dict]:
+        """调用真实LLM批量分析文档"""
+        # 多篇文档合并到一个请求中，各组请求并发发送
+        if self.docs_per_request > 1:
+            groups = [documents[i:i + self.docs_per_request] for i in range(0, len(documents), self.docs_per_request)]
+            with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+                return [result for group_results in executor.map(self._analyze_group, groups) for result in group_results]
+        
+        # 调用LLM接口主要是等待网络响应，并发发送请求；
+        # 调用方已在事件循环中时不能再调用asyncio.run，改用线程池并发
+        if HAS_AIOHTTP and not _in_event_loop():
+            return asyncio.run(self._abatch_analyze(documents))
+        with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+            return list(executor.map(self._analyze_document_safe, documents))
+    
+    @property
+    def analyzes_async(self) -> bool:
+        """abatch_analyze是否直接在事件循环中并发调用LLM（否则在线程中执行batch_analyze）"""
+        return self.use_real_llm and HAS_AIOHTTP and self.docs_per_request == 1
+    
+    async def abatch_analyze(self, documents: List[Dict], session=None,
+                             semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict]:
+        """批量分析文档的异步版本，可在已运行的事件循环中调用
+        
+        Args:
+            documents: 文档列表
+            session: 可选的aiohttp会话，多批文档并发分析时共用
+            semaphore: 可选的信号量，多批文档共用以限制总的并发请求数
+        
+        Returns:
+            分析结果列表
+        """
+        if not self.analyzes_async:
+            return await asyncio.to_thread(self.batch_analyze, documents)
+        
+        logger.info(f"开始批量分析 {len(documents)} 个文档")
+        # 在线程中加载分词器，避免首次截断内容时阻塞事件循环
+        await asyncio.to_thread(self._tokenizer)
+        if self.semantic_cache is None:
+            return await self._abatch_analyze(documents, session=session, semaphore=semaphore)
         
+        await asyncio.to_thread(self._prefetch_semantic, documents)
+        try:
+            return await self._abatch_analyze(documents, session=session, semaphore=semaphore)
+        finally:
+            self.semantic_cache.clear_prefetched()
+    
+    async def _abatch_analyze(self, documents: List[Dict], concurrency: int = LLM_CONCURRENCY, session=None,
+                              semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict]:
+        """异步批量调用LLM分析文档，使用信号量限制同时进行的请求数
+        
+        Args:
+            documents: 文档列表
+            concurrency: 最大并发请求数（未提供信号量时使用）
+            session: aiohttp会话，未提供时新建
+            semaphore: 限制并发请求数的信号量，未提供时新建
+        
+        Returns:
+            与documents顺序一致的分析结果列表
+        """
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(concurrency)
+        if session is None:
+            connector = aiohttp.TCPConnector(limit=concurrency)
+            async with aiohttp.ClientSession(connector=connector) as session:
+                return await self._abatch_analyze(documents, concurrency, session, semaphore)
+        
+        async def bounded_analyze(doc):
+            async with semaphore:
+                try:
+                    return await self._aanalyze_document(session, doc)
+                except Exception as e:
+                    return self._error_result(doc, e)
+        
+        return await asyncio.gather(*(bounded_analyze(doc) for doc in documents))
+    
+    def _analyze_group(self, documents: List[Dict]) -> List[Dict]:
+        """用一次LLM请求分析一组文档，合并请求失败时退回到逐篇分析"""
+        contents = [doc.get('content', '') for doc in documents]
+        non_empty = [content for content in contents if content]
+        llm_results = self._batch_call_llm_api(non_empty) if non_empty else []
+        if llm_results is None:
+            return [self._analyze_document_safe(doc) for doc in documents]
+        
+        llm_results = iter(llm_results)
+        results = []
+        for doc, content in zip(documents, contents):
+            analysis_result = self._new_analysis_result(doc)
+            if content:
+                self._apply_llm_result(analysis_result, next(llm_results))
+            results.append(analysis_result)
         return results
     
+    def _analyze_document_safe(self, doc: Dict) -> Dict:
+        """分析单个文档，出错时返回包含错误信息的结果而不是抛出异常"""
+        try:
+            return self.analyze_document(doc)
+        except Exception as e:
+            return self._error_result(doc, e)
+    
+    def _error_result(self, doc: Dict, error: Exception) -> Dict:
+        """记录错误并生成失败文档的结果，以便继续处理其他文档"""
+        logger.error(f"分析文档失败: {error}")
+        return {
+            'title': doc.get('title', '未命名文档'),
+            'url': doc.get('url', ''),
+            'error': str(error)
+        }
+    
     def load_documents_from_json(self, file_path: str) -> List[Dict]:
         """从JSON文件加载文档数据
         
@@ -438,18 +1035,25 @@ class LLMAnalyzer:
             return []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # 确保返回的是列表
-                if isinstance(data, dict):
-                    # 如果是单个文档，包装成列表
-                    return [data]
-                elif isinstance(data, list):
-                    return data
-                else:
-                    logger.error(f"文件格式不正确，期望列表或字典: {file_path}")
-                    return []
-        except json.JSONDecodeError as e:
+            if HAS_ORJSON:
+                # 内存映射文件，orjson直接解析映射的内容，不再先读出一份完整的bytes
+                with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        data = orjson.loads(view)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            # 确保返回的是列表
+            if isinstance(data, dict):
+                # 如果是单个文档，包装成列表
+                return [data]
+            elif isinstance(data, list):
+                return data
+            else:
+                logger.error(f"文件格式不正确，期望列表或字典: {file_path}")
+                return []
+        except ValueError as e:
+            # 包括json/orjson的解析错误，以及空文件无法内存映射的情况
             logger.error(f"JSON解析错误: {e}")
             return []
     
@@ -464,8 +1068,13 @@ class LLMAnalyzer:
             是否保存成功
         """
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+            if HAS_ORJSON:
+                with open(output_file, 'wb') as f:
+                    f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                # json.dump会分很多小段写入，使用较大的缓冲区减少系统调用
+                with open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+                    json.dump(results, f, ensure_ascii=False, indent=2)
             logger.info(f"分析结果已保存到: {output_file}")
             return True
         except Exception as e:
@@ -483,98 +1092,26 @@ class LLMAnalyzer:
             是否生成成功
         """
         try:
-            # 计算统计信息
+            # 一次遍历同时统计成功数并准备转义后的展示字段
+            rows = []
+            success_docs = 0
+            for r in results:
+                success_docs += 'error' not in r
+                rows.append(_report_row(r))
             total_docs = len(results)
-            success_docs = sum(1 for r in results if 'error' not in r)
-            failed_docs = total_docs - success_docs
             
-            # 创建HTML报告
-            html_content = f"""
-            <!DOCTYPE html>
-            <html lang="zh-CN">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>文档分析报告</title>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 1200px; margin: 0 auto; padding: 20px; }}
-                    h1, h2, h3 {{ color: #2c3e50; }}
-                    .summary {{ background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin-bottom: 20px; }}
-                    .stats-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }}
-                    .stat-card {{ background-color: #fff; border: 1px solid #ddd; border-radius: 8px; padding: 20px; text-align: center; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-                    .stat-value {{ font-size: 2.5em; font-weight: bold; color: #3498db; margin-bottom: 10px; }}
-                    .stat-label {{ color: #7f8c8d; font-size: 1.1em; }}
-                    table {{ width: 100%; border-collapse: collapse; margin-bottom: 20px; }}
-                    th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }}
-                    th {{ background-color: #f2f2f2; font-weight: bold; }}
-                    tr:hover {{ background-color: #f5f5f5; }}
-                    .success {{ color: #27ae60; }}
-                    .error {{ color: #e74c3c; }}
-                    .document-item {{ margin-bottom: 30px; padding: 20px; border: 1px solid #ddd; border-radius: 8px; }}
-                    .keywords {{ color: #3498db; font-weight: bold; }}
-                    .key-points {{ margin-top: 10px; padding-left: 20px; }}
-                </style>
-            </head>
-            <body>
-                <h1>文档分析报告</h1>
-                
-                <div class="summary">
-                    <h2>总体统计</h2>
-                    <div class="stats-grid">
-                        <div class="stat-card">
-                            <div class="stat-value">{total_docs}</div>
-                            <div class="stat-label">总文档数</div>
-                        </div>
-                        <div class="stat-card">
-                            <div class="stat-value success">{success_docs}</div>
-                            <div class="stat-label">成功分析</div>
-                        </div>
-                        <div class="stat-card">
-                            <div class="stat-value error">{failed_docs}</div>
-                            <div class="stat-label">分析失败</div>
-                        </div>
-                    </div>
-                </div>
-                
-                <h2>文档分析详情</h2>
-            """
-            
-            # 添加每个文档的分析结果
-            for result in results:
-                if 'error' in result:
-                    # 错误文档
-                    html_content += f"""
-                    <div class="document-item">
-                        <h3>{result.get('title', '未命名文档')}</h3>
-                        <p class="error">错误: {result['error']}</p>
-                        <p>URL: <a href="{result.get('url', '')}" target="_blank">{result.get('url', '')}</a></p>
-                    </div>
-                    """
+            # 边渲染边写入HTML报告，不在内存中拼接完整的报告字符串
+            with open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+                if ANALYSIS_REPORT_TEMPLATE is None:
+                    _write_report_html(f, total_docs, success_docs, rows)
                 else:
-                    # 成功分析的文档
-                    keywords_html = ', '.join(f'<span class="keywords">{kw}</span>' for kw in result.get('keywords', []))
-                    key_points_html = ''.join(f'<li>{point}</li>' for point in result.get('key_points', []))
-                    
-                    html_content += f"""
-                    <div class="document-item">
-                        <h3>{result.get('title', '未命名文档')}</h3>
-                        <p>发布时间: {result.get('publish_time', '未知')}</p>
-                        <p>URL: <a href="{result.get('url', '')}" target="_blank">{result.get('url', '')}</a></p>
-                        <p>摘要: {result.get('summary', '')}</p>
-                        <p>关键词: {keywords_html}</p>
-                        {f'<div class="key-points"><p>关键点:</p><ul>{key_points_html}</ul></div>' if key_points_html else ''}
-                    </div>
-                    """
-            
-            # 结束HTML内容
-            html_content += f"""
-            </body>
-            </html>
-            """
-            
-            # 保存HTML报告
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+                    ANALYSIS_REPORT_TEMPLATE.stream(
+                        style=REPORT_STYLE,
+                        total_docs=total_docs,
+                        success_docs=success_docs,
+                        failed_docs=total_docs - success_docs,
+                        rows=rows
+                    ).dump(f)
             
             logger.info(f"分析报告已保存到: {output_file}")
             return True
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+LLM结果缓存 - 按内容哈希或语义相似度缓存LLM分析结果，相同或近似的文档不再重复调用模型
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 尝试导入orjson（可选），JSON序列化和解析比标准库json快数倍
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# 默认缓存文件位置
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'easy-crawler', 'llm_cache.sqlite')
+DEFAULT_MEMORY_SIZE = 1024  # 内存中最多保留的条目数，超出时淘汰最久未使用的条目
+
+# 语义缓存默认配置
+DEFAULT_EMBED_MODEL = 'nomic-embed-text'
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+SEMANTIC_INITIAL_CAPACITY = 64  # 向量矩阵的初始行数，写满后容量翻倍
+MAX_PENDING_VECTORS = 4096  # 查找未命中后暂存、等待set使用的向量数上限
+
+
+class LLMCache:
+    """基于SQLite的LLM结果缓存，同时在内存中保留最近读写过的条目（LRU）"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: Optional[float] = None,
+                 memory_size: int = DEFAULT_MEMORY_SIZE):
+        """初始化缓存
+
+        Args:
+            path: SQLite缓存文件路径
+            ttl: 缓存有效期（秒），为None时永不过期
+            memory_size: 内存中最多保留的条目数
+        """
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self._memory = OrderedDict()  # key -> (结果, 写入时间)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, value TEXT, created REAL)')
+        self._conn.commit()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key: str, entry):
+        """将条目放入内存缓存，超出容量时淘汰最久未使用的条目（调用方需持有锁）"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """读取缓存的结果，不存在或已过期时返回None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._conn.execute('SELECT value, created FROM cache WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return None
+                entry = (orjson.loads(row[0]) if HAS_ORJSON else json.loads(row[0]), row[1])
+                self._remember(key, entry)
+            else:
+                self._memory.move_to_end(key)
+
+        value, created = entry
+        if self._expired(created):
+            return None
+        return value
+
+    def set(self, key: str, value: Dict):
+        """写入缓存"""
+        created = time.time()
+        with self._lock:
+            self._remember(key, (value, created))
+            try:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO cache(key, value, created) VALUES (?, ?, ?)',
+                    (key, orjson.dumps(value).decode('utf-8') if HAS_ORJSON else json.dumps(value, ensure_ascii=False), created)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"写入LLM缓存失败: {e}")
+
+    def close(self):
+        """关闭缓存数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class SemanticLLMCache:
+    """语义近似缓存：内容向量与已分析文档的余弦相似度超过阈值时复用其结果，
+    用于转载、改写等内容几乎相同但哈希不同的文档"""
+
+    def __init__(self, embed_url: str, model: str = DEFAULT_EMBED_MODEL,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD, session: Optional[requests.Session] = None,
+                 timeout: float = 60):
+        """初始化语义缓存
+
+        Args:
+            embed_url: ollama embed接口地址，如 http://localhost:11434/api/embed
+            model: 向量模型名称
+            threshold: 复用结果所需的最低余弦相似度
+            session: 可选的requests会话
+            timeout: 请求超时时间（秒）
+        """
+        self.embed_url = embed_url
+        self.model = model
+        self.threshold = threshold
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+        self._embeddings = None  # 已缓存结果的单位向量矩阵，预留容量，前len(self._results)行有效
+        self._results = []
+        self._prefetched = {}  # 预先批量计算好的文本向量
+        self._lock = threading.Lock()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """调用ollama批量计算文本向量，返回归一化后的矩阵"""
+        response = self.session.post(self.embed_url, json={'model': self.model, 'input': texts}, timeout=self.timeout)
+        response.raise_for_status()
+        vectors = np.asarray(response.json()['embeddings'], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = self._prefetched.pop(text, None)
+        if vector is None:
+            vector = self._embed([text])[0]
+        return vector
+
+    def prefetch(self, texts: List[str]):
+        """一次请求批量计算一批文本的向量，后续get/set直接使用"""
+        texts = [text for text in dict.fromkeys(texts) if text and text not in self._prefetched]
+        if not texts:
+            return
+        try:
+            self._prefetched.update(zip(texts, self._embed(texts)))
+        except Exception as e:
+            logger.warning(f"批量计算文本向量失败: {e}")
+
+    def clear_prefetched(self):
+        """丢弃预先计算但未被使用的文本向量，每批文档分析结束后调用"""
+        self._prefetched.clear()
+
+    def get(self, text: str) -> Optional[Dict]:
+        """查找语义相近文档的结果，没有足够相似的文档时返回None"""
+        try:
+            vector = self._vector(text)
+        except Exception as e:
+            logger.warning(f"计算文本向量失败: {e}")
+            return None
+
+        with self._lock:
+            if self._results:
+                similarities = self._embeddings[:len(self._results)] @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    return self._results[best]
+            # 未命中时保留向量，供随后的set使用；调用失败时不会有set，超过上限时丢弃最早的向量
+            while len(self._prefetched) >= MAX_PENDING_VECTORS:
+                self._prefetched.pop(next(iter(self._prefetched)))
+            self._prefetched[text] = vector
+        return None
+
+    def discard(self, text: str):
+        """丢弃为该文本暂存的向量（分析失败、不会调用set时使用）"""
+        self._prefetched.pop(text, None)
+
+    def set(self, text: str, value: Dict):
+        """记录文本向量及其分析结果"""
+        try:
+            vector = self._vector(text)
+        except Exception as e:
+            logger.warning(f"计算文本向量失败: {e}")
+            return
+
+        with self._lock:
+            size = len(self._results)
+            if self._embeddings is None:
+                self._embeddings = np.empty((SEMANTIC_INITIAL_CAPACITY, vector.shape[0]), dtype=np.float32)
+            elif size == len(self._embeddings):
+                # 容量翻倍，均摊下来每次插入只复制常数个向量
+                grown = np.empty((size * 2, self._embeddings.shape[1]), dtype=np.float32)
+                grown[:size] = self._embeddings
+                self._embeddings = grown
+            self._embeddings[size] = vector
+            self._results.append(value)
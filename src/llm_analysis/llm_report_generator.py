@@ -3,20 +3,53 @@
 """
 LLM报告生成器 - 用于生成LLM分析报告
 """
+import asyncio
+import hashlib
 import json
 import os
 import logging
 import datetime
-from typing import List, Dict
-from src.llm_analysis.llm_analyzer import LLMAnalyzer
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from src.llm_analysis.llm_analyzer import LLMAnalyzer, LLM_CONCURRENCY
+
+# 尝试导入blake3（可选），大文件哈希比sha256快得多
+try:
+    from blake3 import blake3
+    HAS_BLAKE3 = True
+except ImportError:
+    HAS_BLAKE3 = False
+
+# 尝试导入aiohttp（可选），各文件的LLM请求共用一个会话
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 记录已处理输入文件的清单文件名（位于输出目录下）
+MANIFEST_FILE = '.cache.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: str) -> str:
+    """计算文件内容的哈希值（优先使用blake3）"""
+    hasher = blake3() if HAS_BLAKE3 else hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return ('blake3:' if HAS_BLAKE3 else 'sha256:') + hasher.hexdigest()
+
 class LLMReportGenerator:
     """LLM报告生成器类"""
     
+    # 按(ollama_url, model)共享的分析器，多次创建生成器时复用同一个HTTP会话和缓存
+    _analyzers: Dict = {}
+    
     def __init__(self, ollama_url: str = "http://localhost:11434/api/generate", model: str = "deepseek-r1:7b"):
         """初始化报告生成器
         
@@ -24,10 +57,14 @@ class LLMReportGenerator:
             ollama_url: Ollama API的URL地址
             model: 使用的LLM模型名称
         """
-        self.analyzer = LLMAnalyzer(ollama_url=ollama_url, model=model)
+        key = (ollama_url, model)
+        if key not in self._analyzers:
+            self._analyzers[key] = LLMAnalyzer(ollama_url=ollama_url, model=model)
+        self.analyzer = self._analyzers[key]
         
     def analyze_and_generate_report(self, input_files: List[str], output_dir: str = '.', 
-                                   generate_json: bool = True, generate_html: bool = True) -> Dict:
+                                   generate_json: bool = True, generate_html: bool = True,
+                                   skip_unchanged: bool = True) -> Dict:
         """分析多个文件并生成报告
         
         Args:
@@ -35,53 +72,73 @@ class LLMReportGenerator:
             output_dir: 输出目录
             generate_json: 是否生成JSON结果文件
             generate_html: 是否生成HTML报告
+            skip_unchanged: 是否跳过自上次成功分析后未变化的文件，直接复用其结果
         
         Returns:
             包含所有分析结果的字典
         """
-        all_documents = []
-        all_results = []
+        def run():
+            return asyncio.run(self.aanalyze_and_generate_report(
+                input_files, output_dir, generate_json, generate_html, skip_unchanged
+            ))
         
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run()
+        # 调用方已在事件循环中（如Jupyter、异步Web框架）时不能再调用asyncio.run，改在单独的线程中运行
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(run).result()
+    
+    async def aanalyze_and_generate_report(self, input_files: List[str], output_dir: str = '.', 
+                                          generate_json: bool = True, generate_html: bool = True,
+                                          skip_unchanged: bool = True) -> Dict:
+        """analyze_and_generate_report的异步版本，各文件的分析和报告生成并发进行"""
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
         
-        # 加载并分析所有文件
-        for file_path in input_files:
-            if not os.path.exists(file_path):
-                logger.warning(f"文件不存在: {file_path}")
-                continue
-            
-            # 加载文档
-            documents = self.analyzer.load_documents_from_json(file_path)
-            if not documents:
-                logger.warning(f"未能从文件加载有效文档: {file_path}")
-                continue
-            
-            all_documents.extend(documents)
-            
-            # 分析文档
-            results = self.analyzer.batch_analyze(documents)
+        manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        manifest = self._load_manifest(manifest_path) if skip_unchanged else {}
+        
+        # 并发处理所有文件，结果顺序与input_files一致
+        if HAS_AIOHTTP and self.analyzer.analyzes_async:
+            # 所有文件共用一个会话和信号量，同时发给ollama的请求总数不超过LLM_CONCURRENCY
+            semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=LLM_CONCURRENCY)) as session:
+                file_results = await asyncio.gather(*(
+                    self._process_file(file_path, output_dir, generate_json, generate_html, manifest,
+                                       session=session, semaphore=semaphore)
+                    for file_path in input_files
+                ))
+        else:
+            # 线程池或进程池批量分析时每批都会占满并发数，各文件的分析逐个进行
+            analysis_lock = asyncio.Lock()
+            file_results = await asyncio.gather(*(
+                self._process_file(file_path, output_dir, generate_json, generate_html, manifest,
+                                   analysis_lock=analysis_lock)
+                for file_path in input_files
+            ))
+        
+        total_documents = 0
+        success_count = 0
+        all_results = []
+        for document_count, results in file_results:
+            total_documents += document_count
             all_results.extend(results)
-            
-            # 为每个文件生成单独的报告
-            file_name = os.path.basename(file_path).split('.')[0]
-            
-            if generate_json:
-                json_output = os.path.join(output_dir, f'{file_name}_analysis.json')
-                self.analyzer.save_analysis_results(results, json_output)
-            
-            if generate_html:
-                html_output = os.path.join(output_dir, f'{file_name}_analysis.html')
-                self.analyzer.generate_analysis_report(results, html_output)
+            for r in results:
+                success_count += 'error' not in r
+        
+        if skip_unchanged:
+            await asyncio.to_thread(self._save_manifest, manifest_path, manifest)
         
         # 生成合并后的报告
         timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
         summary = {
             'total_files': len(input_files),
-            'total_documents': len(all_documents),
+            'total_documents': total_documents,
             'total_results': len(all_results),
-            'success_count': sum(1 for r in all_results if 'error' not in r),
-            'error_count': sum(1 for r in all_results if 'error' in r),
+            'success_count': success_count,
+            'error_count': len(all_results) - success_count,
             'reports': []
         }
         
@@ -98,6 +155,97 @@ class LLMReportGenerator:
                 summary['reports'].append(merged_html)
         
         return summary
+    
+    async def _process_file(self, file_path: str, output_dir: str, generate_json: bool, generate_html: bool,
+                            manifest: Optional[Dict] = None, session=None,
+                            semaphore: Optional[asyncio.Semaphore] = None,
+                            analysis_lock: Optional[asyncio.Lock] = None):
+        """加载、分析单个文件并生成该文件的报告
+        
+        Args:
+            manifest: 已处理文件清单，传入时跳过未变化的文件并记录本次成功处理的文件
+            session: 各文件共用的aiohttp会话
+            semaphore: 各文件共用的LLM并发请求信号量
+            analysis_lock: 传入时各文件的分析步骤互斥进行
+        
+        Returns:
+            (文档数, 分析结果列表)，文件无效时为 (0, [])
+        """
+        if not os.path.exists(file_path):
+            logger.warning(f"文件不存在: {file_path}")
+            return 0, []
+        
+        file_name = os.path.basename(file_path).split('.')[0]
+        json_output = os.path.join(output_dir, f'{file_name}_analysis.json')
+        html_output = os.path.join(output_dir, f'{file_name}_analysis.html')
+        outputs = ([json_output] if generate_json else []) + ([html_output] if generate_html else [])
+        
+        # 文件未变化且上次的输出都还在时，直接复用已保存的分析结果
+        key = os.path.abspath(file_path)
+        mtime = digest = None
+        if manifest is not None:
+            mtime = os.stat(file_path).st_mtime
+            digest = await asyncio.to_thread(file_digest, file_path)
+            entry = manifest.get(key)
+            if (entry and entry.get('mtime') == mtime and entry.get('hash') == digest
+                    and set(outputs) <= set(entry.get('outputs', []))
+                    and all(os.path.exists(path) for path in entry['outputs'])):
+                results = await asyncio.to_thread(self.analyzer.load_documents_from_json, entry['results'])
+                if results:
+                    logger.info(f"文件未变化，复用上次的分析结果: {file_path}")
+                    return entry.get('documents', len(results)), results
+        
+        # 加载文档
+        documents = await asyncio.to_thread(self.analyzer.load_documents_from_json, file_path)
+        if not documents:
+            logger.warning(f"未能从文件加载有效文档: {file_path}")
+            return 0, []
+        
+        # 分析文档
+        if analysis_lock is not None:
+            async with analysis_lock:
+                results = await self.analyzer.abatch_analyze(documents)
+        else:
+            results = await self.analyzer.abatch_analyze(documents, session=session, semaphore=semaphore)
+        
+        # 为每个文件生成单独的报告，写文件放到线程中，与其他文件的LLM调用重叠
+        tasks = []
+        if generate_json:
+            tasks.append(asyncio.to_thread(self.analyzer.save_analysis_results, results, json_output))
+        if generate_html:
+            tasks.append(asyncio.to_thread(self.analyzer.generate_analysis_report, results, html_output))
+        await asyncio.gather(*tasks)
+        
+        # 只记录全部分析成功且保存了JSON结果的文件，失败的文档下次会重新分析
+        if manifest is not None and generate_json and all('error' not in r for r in results):
+            manifest[key] = {
+                'mtime': mtime,
+                'hash': digest,
+                'documents': len(documents),
+                'results': json_output,
+                'outputs': outputs
+            }
+        
+        return len(documents), results
+    
+    def _load_manifest(self, manifest_path: str) -> Dict:
+        """加载已处理文件清单，不存在或损坏时返回空清单"""
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest if isinstance(manifest, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_manifest(self, manifest_path: str, manifest: Dict):
+        """先写临时文件再替换，保证清单文件不会被写坏"""
+        tmp_path = manifest_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, manifest_path)
+        except OSError as e:
+            logger.warning(f"保存文件清单失败: {e}")
 
 # 使用示例
 if __name__ == "__main__":
@@ -111,6 +259,7 @@ if __name__ == "__main__":
     parser.add_argument('--model', default='deepseek-r1:7b', help='使用的LLM模型名称')
     parser.add_argument('--no-json', action='store_true', help='不生成JSON结果文件')
     parser.add_argument('--no-html', action='store_true', help='不生成HTML报告')
+    parser.add_argument('--force', action='store_true', help='忽略已处理文件清单，重新分析所有文件')
     
     # 如果没有参数，显示帮助信息
     if len(sys.argv) == 1:
@@ -131,7 +280,8 @@ if __name__ == "__main__":
         input_files, 
         output_dir, 
         generate_json=not args.no_json, 
-        generate_html=not args.no_html
+        generate_html=not args.no_html,
+        skip_unchanged=not args.force
     )
     
     print(f"\n=== 分析摘要 ===")
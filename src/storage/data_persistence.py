@@ -6,72 +6,71 @@
 # @Software: PyCharm
 # 数据持久化模块 - 支持多种数据持久化方式
 
+import atexit
+import hashlib
+import importlib.util
 import json
-import pandas as pd
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
-# 导入FAISS持久化（先尝试导入，如果失败则继续）
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 尝试导入orjson（可选），JSON序列化比标准库json快数倍
 try:
-    from src.storage.vector_db import FAISSPersistence
-    HAS_FAISS = True
+    import orjson
+    HAS_ORJSON = True
+    ORJSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
 except ImportError:
-    HAS_FAISS = False
+    HAS_ORJSON = False
 
-class DataPersistence(ABC):
-    """数据持久化抽象基类"""
-    
-    @abstractmethod
-    def save(self, data, output_path=None):
-        """保存数据"""
-        pass
+# 尝试导入DBUtils（可选），用于MySQL连接池
+try:
+    from dbutils.pooled_db import PooledDB
+    HAS_DBUTILS = True
+except ImportError:
+    HAS_DBUTILS = False
 
+# 只检查faiss是否安装而不导入，向量数据库相关依赖（faiss、sentence-transformers）在首次使用时才加载
+HAS_FAISS = importlib.util.find_spec('faiss') is not None
 
-class JSONPersistence(DataPersistence):
-    """JSON文件持久化实现"""
-    
-    def save(self, data, output_path=None):
-        """将数据保存为JSON文件"""
-        if output_path is None:
-            raise ValueError("必须提供输出文件路径")
-            
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
-        print(f"数据已保存到JSON文件: {output_path}")
-        return output_path
+# 未安装orjson时共享的JSON编码器，不必每次保存都重新创建
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
 
+# 写JSON和报告文件时使用的缓冲区大小，逐条写入时减少系统调用次数
+WRITE_BUFFER_SIZE = 1 << 20
 
-class HTMLReportPersistence(DataPersistence):
-    """HTML报告持久化实现"""
-    
-    def save(self, data, output_path=None):
-        """生成并保存HTML统计报告"""
-        if output_path is None:
-            output_path = 'extraction_report.html'
-            
-        # 计算统计数据
-        total = len(data)
-        successful = sum(1 for r in data if 'error' not in r)
-        failed = total - successful
-        success_rate = (successful / total * 100) if total > 0 else 0
-        
-        # 计算平均内容长度和图片数量
-        if successful > 0:
-            avg_content_length = sum(r.get('content_length', 0) for r in data if 'error' not in r) / successful
-            avg_image_count = sum(r.get('image_count', 0) for r in data if 'error' not in r) / successful
-        else:
-            avg_content_length = 0
-            avg_image_count = 0
-        
-        # 提取方法统计
-        source_stats = {}
-        for r in data:
-            if 'error' not in r and 'source' in r:
-                source = r['source']
-                source_stats[source] = source_stats.get(source, 0) + 1
-        
-        # 创建HTML报告
-        html_content = f"""
+# 本进程中已确认表存在的数据库，键为(host, database)
+_TABLES_ENSURED = set()
+_TABLES_ENSURED_LOCK = threading.Lock()
+
+# 连接池最多同时打开的连接数
+DB_POOL_SIZE = 8
+
+# 批量写入文章时每条INSERT语句包含的行数
+DB_INSERT_BATCH_SIZE = 1000
+ARTICLE_UPSERT_SQL = """
+    INSERT INTO articles (url, title, content, publish_time, channel, channel_name, module, module_name)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        title = VALUES(title),
+        content = VALUES(content),
+        publish_time = VALUES(publish_time),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# 后台写入数据库时的队列容量（按save调用计）及停止标记
+DB_QUEUE_SIZE = 1000
+_WRITER_STOP = object()
+
+# HTML报告的固定部分（样式等）和带占位符的模板，模块加载时构建一次
+REPORT_HEAD = """
         <!DOCTYPE html>
         <html lang="zh-CN">
         <head>
@@ -79,70 +78,71 @@ class HTMLReportPersistence(DataPersistence):
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <title>网页内容提取报告</title>
             <style>
-                body {{
+                body {
                     font-family: Arial, sans-serif;
                     line-height: 1.6;
                     color: #333;
                     max-width: 1000px;
                     margin: 0 auto;
                     padding: 20px;
-                }}
-                h1, h2, h3 {{
+                }
+                h1, h2, h3 {
                     color: #2c3e50;
-                }}
-                .summary {{
+                }
+                .summary {
                     background-color: #f8f9fa;
                     padding: 20px;
                     border-radius: 8px;
                     margin-bottom: 20px;
-                }}
-                .stats-grid {{
+                }
+                .stats-grid {
                     display: grid;
                     grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
                     gap: 20px;
                     margin-bottom: 30px;
-                }}
-                .stat-card {{
+                }
+                .stat-card {
                     background-color: #fff;
                     border: 1px solid #ddd;
                     border-radius: 8px;
                     padding: 20px;
                     text-align: center;
                     box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                .stat-value {{
+                }
+                .stat-value {
                     font-size: 2.5em;
                     font-weight: bold;
                     color: #3498db;
                     margin-bottom: 10px;
-                }}
-                .stat-label {{
+                }
+                .stat-label {
                     color: #7f8c8d;
                     font-size: 1.1em;
-                }}
-                table {{
+                }
+                table {
                     width: 100%;
                     border-collapse: collapse;
                     margin-bottom: 20px;
-                }}
-                th, td {{
+                }
+                th, td {
                     padding: 12px;
                     text-align: left;
                     border-bottom: 1px solid #ddd;
-                }}
-                th {{
+                }
+                th {
                     background-color: #f2f2f2;
                     font-weight: bold;
-                }}
-                tr:hover {{
+                }
+                tr:hover {
                     background-color: #f5f5f5;
-                }}
-                .success {{ color: #27ae60; }}
-                .error {{ color: #e74c3c; }}
+                }
+                .success { color: #27ae60; }
+                .error { color: #e74c3c; }
             </style>
         </head>
         <body>
-            <h1>网页内容提取报告</h1>
+"""
+REPORT_SUMMARY_TEMPLATE = """            <h1>网页内容提取报告</h1>
             
             <div class="summary">
                 <h2>总体统计</h2>
@@ -188,20 +188,7 @@ class HTMLReportPersistence(DataPersistence):
                     <th>占比</th>
                 </tr>
         """
-        
-        # 添加提取方法统计行
-        for source, count in source_stats.items():
-            percentage = (count / successful * 100) if successful > 0 else 0
-            html_content += f"""
-                <tr>
-                    <td>{source}</td>
-                    <td>{count}</td>
-                    <td>{percentage:.1f}%</td>
-                </tr>
-            """
-        
-        # 添加详细结果表格
-        html_content += f"""
+REPORT_DETAIL_HEADER = """
             </table>
             
             <h2>详细结果</h2>
@@ -215,18 +202,33 @@ class HTMLReportPersistence(DataPersistence):
                     <th>提取方法</th>
                 </tr>
         """
+REPORT_FOOT_TEMPLATE = """
+            </table>
         
-        # 添加详细结果行
-        for result in data:
-            url = result.get('url', '')
-            status = '成功' if 'error' not in result else '失败'
-            status_class = 'success' if 'error' not in result else 'error'
-            title = result.get('title', '')[:50] + '...' if len(result.get('title', '')) > 50 else result.get('title', '')
-            content_length = result.get('content_length', 0)
-            image_count = result.get('image_count', 0)
-            source = result.get('source', '')
-            
-            html_content += f"""
+            <footer>
+                <p style="text-align: center; color: #7f8c8d; margin-top: 50px;">报告生成时间: {timestamp}</p>
+            </footer>
+        </body>
+        </html>
+        """
+# HTML转义表，str.translate单次遍历完成全部替换
+_HTML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+
+
+def escape_html(value):
+    """转义插入HTML报告中的爬取字段"""
+    return str(value).translate(_HTML_ESCAPE_TABLE)
+
+
+# HTML报告中的表格行模板
+SOURCE_ROW_TEMPLATE = """
+                <tr>
+                    <td>{source}</td>
+                    <td>{count}</td>
+                    <td>{percentage:.1f}%</td>
+                </tr>
+            """
+RESULT_ROW_TEMPLATE = """
                 <tr>
                     <td>{url}</td>
                     <td class="{status_class}">{status}</td>
@@ -236,29 +238,167 @@ class HTMLReportPersistence(DataPersistence):
                     <td>{source}</td>
                 </tr>
             """
+
+class DataPersistence(ABC):
+    """数据持久化抽象基类"""
+    
+    __slots__ = ()
+    
+    @abstractmethod
+    def save(self, data, output_path=None):
+        """保存数据"""
+        pass
+
+
+class JSONPersistence(DataPersistence):
+    """JSON文件持久化实现"""
+    
+    __slots__ = ()
+    
+    def save(self, data, output_path=None):
+        """将数据保存为JSON文件"""
+        if output_path is None:
+            raise ValueError("必须提供输出文件路径")
+            
+        if HAS_ORJSON and isinstance(data, list) and data:
+            # 逐条序列化写入，不在内存中生成整个文件的内容；
+            # 每条记录整体缩进一级，输出与一次性序列化整个列表相同
+            with open(output_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(b'[')
+                for i, item in enumerate(data):
+                    f.write(b',\n  ' if i else b'\n  ')
+                    f.write(orjson.dumps(item, option=ORJSON_OPTIONS).replace(b'\n', b'\n  '))
+                f.write(b'\n]')
+        elif HAS_ORJSON:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=ORJSON_OPTIONS))
+        else:
+            # 按片段编码写入，不会生成整个文件的内容
+            with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+                f.writelines(_JSON_ENCODER.iterencode(data))
+            
+        logger.info("数据已保存到JSON文件: %s", output_path)
+        return output_path
+
+
+class HTMLReportPersistence(DataPersistence):
+    """HTML报告持久化实现"""
+    
+    __slots__ = ()
+    
+    def save(self, data, output_path=None):
+        """生成并保存HTML统计报告"""
+        if output_path is None:
+            output_path = 'extraction_report.html'
         
-        # 结束HTML内容
-        html_content += f"""
-            </table>
+        # 数据与上次生成报告时相同且报告仍在时，不再重新生成
+        hash_path = output_path + '.hash'
+        data_hash = self._data_hash(data)
+        if data_hash is not None and os.path.exists(output_path):
+            try:
+                with open(hash_path, 'r', encoding='utf-8') as f:
+                    if f.read() == data_hash:
+                        logger.info("数据未变化，沿用已有的统计报告: %s", output_path)
+                        return output_path
+            except OSError:
+                pass
+            
+        # 一次遍历计算成功数、内容长度和图片数量总和以及提取方法统计
+        total = len(data)
+        successful = 0
+        total_content_length = 0
+        total_image_count = 0
+        source_stats = {}
+        for r in data:
+            if 'error' in r:
+                continue
+            successful += 1
+            total_content_length += r.get('content_length', 0)
+            total_image_count += r.get('image_count', 0)
+            if 'source' in r:
+                source = r['source']
+                source_stats[source] = source_stats.get(source, 0) + 1
         
-            <footer>
-                <p style="text-align: center; color: #7f8c8d; margin-top: 50px;">报告生成时间: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </footer>
-        </body>
-        </html>
-        """
+        failed = total - successful
+        success_rate = (successful / total * 100) if total > 0 else 0
+        
+        # 计算平均内容长度和图片数量
+        if successful > 0:
+            avg_content_length = total_content_length / successful
+            avg_image_count = total_image_count / successful
+        else:
+            avg_content_length = 0
+            avg_image_count = 0
         
-        # 保存HTML报告
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # 创建HTML报告，各片段边生成边通过缓冲区写入文件，不在内存中拼出整个报告
+        with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(REPORT_HEAD)
+            f.write(REPORT_SUMMARY_TEMPLATE.format(
+                total=total,
+                successful=successful,
+                failed=failed,
+                success_rate=success_rate,
+                avg_content_length=avg_content_length,
+                avg_image_count=avg_image_count
+            ))
+            
+            # 添加提取方法统计行
+            for source, count in source_stats.items():
+                percentage = (count / successful * 100) if successful > 0 else 0
+                f.write(SOURCE_ROW_TEMPLATE.format(source=escape_html(source), count=count, percentage=percentage))
+            
+            # 添加详细结果表格
+            f.write(REPORT_DETAIL_HEADER)
+            
+            # 逐行写入详细结果
+            for r in data:
+                failed_row = 'error' in r
+                title = r.get('title', '')
+                if len(title) > 50:
+                    title = title[:50] + '...'
+                f.write(RESULT_ROW_TEMPLATE.format(
+                    url=escape_html(r.get('url', '')),
+                    status_class='error' if failed_row else 'success',
+                    status='失败' if failed_row else '成功',
+                    title=escape_html(title),
+                    content_length=r.get('content_length', 0),
+                    image_count=r.get('image_count', 0),
+                    source=escape_html(r.get('source', ''))
+                ))
+            
+            # 结束HTML内容
+            f.write(REPORT_FOOT_TEMPLATE.format(timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        
+        # 记录本次数据的哈希，先写临时文件再替换
+        if data_hash is not None:
+            try:
+                with open(hash_path + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(data_hash)
+                os.replace(hash_path + '.tmp', hash_path)
+            except OSError as e:
+                logger.warning("保存报告数据哈希失败: %s", e)
         
-        print(f"统计报告已保存到: {output_path}")
+        logger.info("统计报告已保存到: %s", output_path)
         return output_path
+    
+    @staticmethod
+    def _data_hash(data):
+        """计算数据的哈希值（键排序后序列化），无法序列化时返回None"""
+        try:
+            if HAS_ORJSON:
+                encoded = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+            else:
+                encoded = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        except (TypeError, ValueError):
+            return None
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
 
 
 class APIPersistence(DataPersistence):
     """API接口持久化实现（示例框架）"""
     
+    __slots__ = ('api_url', 'api_key')
+    
     def __init__(self, api_url, api_key=None):
         """初始化API持久化器"""
         self.api_url = api_url
@@ -268,8 +408,8 @@ class APIPersistence(DataPersistence):
     def save(self, data, output_path=None):
         """通过API接口保存数据"""
         # 注意：这是一个示例框架，实际使用时需要根据API规范实现
-        print(f"准备通过API保存数据到: {self.api_url}")
-        print(f"数据量: {len(data)}条")
+        logger.info("准备通过API保存数据到: %s", self.api_url)
+        logger.info("数据量: %d条", len(data))
         
         # 这里应该实现实际的API调用逻辑
         # 例如：
@@ -278,18 +418,21 @@ class APIPersistence(DataPersistence):
         # response = requests.post(self.api_url, json=data, headers=headers)
         # response.raise_for_status()
         
-        print("API保存操作已完成（示例）")
+        logger.info("API保存操作已完成（示例）")
         return "api_saved"
 
 
 class DatabasePersistence(DataPersistence):
     """MySQL数据库持久化实现"""
     
-    def __init__(self, db_config=None):
+    __slots__ = ('db_config', 'connection', 'pool', '_queue', '_writer')
+    
+    def __init__(self, db_config=None, background=False):
         """初始化数据库持久化类
         
         Args:
             db_config: 数据库配置信息
+            background: 是否在后台线程中写入数据库，save只将数据放入队列，不阻塞调用方
         """
         self.db_config = db_config or {
             'host': 'localhost',
@@ -298,35 +441,76 @@ class DatabasePersistence(DataPersistence):
             'database': 'cheaa'
         }
         self.connection = None
+        self.pool = None
         self._connect()
         
+        # 后台写入线程及其数据队列
+        self._queue = None
+        self._writer = None
+        if background:
+            self._queue = queue.Queue(maxsize=DB_QUEUE_SIZE)
+            self._writer = threading.Thread(target=self._writer_loop, name='db-writer', daemon=True)
+            self._writer.start()
+            # 进程退出前写完队列中剩余的数据
+            atexit.register(self.close)
+        
     def _connect(self):
         """建立数据库连接"""
         try:
             import pymysql
-            self.connection = pymysql.connect(
+            params = dict(
                 host=self.db_config.get('host', 'localhost'),
                 user=self.db_config.get('user'),
                 password=self.db_config.get('password'),
                 database=self.db_config.get('database'),
                 charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor
+                cursorclass=pymysql.cursors.DictCursor,
+                autocommit=False  # 显式关闭自动提交，每批写入只在最后提交一次
             )
-            print(f"成功连接到MySQL数据库: {self.db_config.get('database')}")
+            if HAS_DBUTILS:
+                # 连接池：取用连接时检查连接是否断开并自动重连，多个线程可以各自取用连接
+                self.pool = PooledDB(pymysql, mincached=1, maxconnections=DB_POOL_SIZE, ping=1, **params)
+            else:
+                self.connection = pymysql.connect(**params)
+            logger.info("成功连接到MySQL数据库: %s", self.db_config.get('database'))
             
             # 确保表存在
             self._ensure_tables_exist()
         except Exception as e:
-            print(f"连接MySQL数据库失败: {e}")
+            logger.error("连接MySQL数据库失败: %s", e)
             self.connection = None
+            self.pool = None
+    
+    def _connected(self):
+        """是否已连接数据库（连接池或单个连接）"""
+        return self.pool is not None or bool(self.connection)
+    
+    def _acquire(self):
+        """取得一个数据库连接：有连接池时从池中取出，否则使用共享的连接"""
+        return self.pool.connection() if self.pool is not None else self.connection
+    
+    def _release(self, connection):
+        """使用完连接后，将从连接池取出的连接归还连接池"""
+        if self.pool is not None:
+            connection.close()
     
     def _ensure_tables_exist(self):
-        """确保必要的表存在"""
-        if not self.connection:
+        """确保必要的表存在（同一进程中每个数据库只检查一次）"""
+        if not self._connected():
             return
         
+        key = (self.db_config.get('host', 'localhost'), self.db_config.get('database'))
+        with _TABLES_ENSURED_LOCK:
+            if key in _TABLES_ENSURED:
+                return
+            if self._create_tables():
+                _TABLES_ENSURED.add(key)
+    
+    def _create_tables(self):
+        """创建必要的表，返回是否成功"""
+        connection = self._acquire()
         try:
-            with self.connection.cursor() as cursor:
+            with connection.cursor() as cursor:
                 # 创建文章表
                 cursor.execute('''
                 CREATE TABLE IF NOT EXISTS articles (
@@ -375,12 +559,15 @@ class DatabasePersistence(DataPersistence):
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
                 )
                 ''')
-            self.connection.commit()
-            print("确保表存在完成")
+            connection.commit()
+            logger.info("确保表存在完成")
+            return True
         except Exception as e:
-            print(f"创建表失败: {e}")
-            if self.connection:
-                self.connection.rollback()
+            logger.error("创建表失败: %s", e)
+            connection.rollback()
+            return False
+        finally:
+            self._release(connection)
     
     def save(self, data, output_path=None):
         """保存数据到数据库
@@ -392,11 +579,6 @@ class DatabasePersistence(DataPersistence):
         Returns:
             str: 保存结果信息
         """
-        if not self.connection:
-            self._connect()
-            if not self.connection:
-                return "数据库连接失败，无法保存数据"
-        
         if not data:
             return "没有数据需要保存"
         
@@ -404,55 +586,139 @@ class DatabasePersistence(DataPersistence):
         if not isinstance(data, list):
             data = [data]
         
+        if self._queue is not None:
+            self._queue.put(data)
+            return f"已将 {len(data)} 条数据加入数据库写入队列"
+        return self._write(data)
+    
+    def _write(self, data):
+        """将一批数据写入数据库"""
+        if not self._connected():
+            self._connect()
+            if not self._connected():
+                return "数据库连接失败，无法保存数据"
+        
+        # 文章基本信息，跳过有错误的数据
+        rows = [
+            (
+                item.get('url', ''),
+                item.get('title', ''),
+                item.get('content', ''),
+                item.get('publish_time'),
+                item.get('channel', ''),
+                item.get('channel_name', ''),
+                item.get('module', ''),
+                item.get('module_name', '')
+            )
+            for item in data if 'error' not in item
+        ]
+        
         saved_count = 0
+        connection = self._acquire()
         try:
-            with self.connection.cursor() as cursor:
-                for item in data:
-                    # 跳过有错误的数据
-                    if 'error' in item:
-                        continue
-                    
-                    # 保存文章基本信息
-                    cursor.execute(
-                        """
-                        INSERT INTO articles (url, title, content, publish_time, channel, channel_name, module, module_name)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        ON DUPLICATE KEY UPDATE
-                            title = VALUES(title),
-                            content = VALUES(content),
-                            publish_time = VALUES(publish_time),
-                            updated_at = CURRENT_TIMESTAMP
-                        """,
-                        (
-                            item.get('url', ''),
-                            item.get('title', ''),
-                            item.get('content', ''),
-                            item.get('publish_time'),
-                            item.get('channel', ''),
-                            item.get('channel_name', ''),
-                            item.get('module', ''),
-                            item.get('module_name', '')
-                        )
-                    )
-                    saved_count += 1
+            # 写入不需要读取结果，使用普通游标而不是默认的DictCursor
+            from pymysql.cursors import Cursor
+            with connection.cursor(Cursor) as cursor:
+                # 分批使用executemany，pymysql会将每批合并为一条多行INSERT语句
+                for i in range(0, len(rows), DB_INSERT_BATCH_SIZE):
+                    batch = rows[i:i + DB_INSERT_BATCH_SIZE]
+                    cursor.executemany(ARTICLE_UPSERT_SQL, batch)
+                    saved_count += len(batch)
             
-            self.connection.commit()
+            connection.commit()
             return f"成功保存 {saved_count} 条数据到数据库"
         except Exception as e:
-            print(f"保存数据到数据库失败: {e}")
-            if self.connection:
-                self.connection.rollback()
+            logger.error("保存数据到数据库失败: %s", e)
+            connection.rollback()
             return f"保存失败: {str(e)}"
         finally:
-            pass
-            # 可选：关闭连接
-            # if self.connection:
-            #     self.connection.close()
+            self._release(connection)
+    
+    def _writer_loop(self):
+        """后台写入线程：取出队列中的数据，并合并当时已在排队的数据一起写入"""
+        stop = False
+        while not stop:
+            batches = [self._queue.get()]
+            items = []
+            while True:
+                if batches[-1] is _WRITER_STOP:
+                    stop = True
+                    break
+                items.extend(batches[-1])
+                if len(items) >= DB_INSERT_BATCH_SIZE:
+                    break
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                if items:
+                    self._write(items)
+            except Exception as e:
+                logger.error("后台写入数据库失败: %s", e)
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+    
+    def flush(self):
+        """等待后台线程写完队列中已有的数据"""
+        if self._queue is not None:
+            self._queue.join()
+    
+    def close(self):
+        """写完队列中的数据后停止后台线程，并关闭数据库连接"""
+        if self._writer is not None:
+            self._queue.put(_WRITER_STOP)
+            self._writer.join()
+            self._writer = None
+            atexit.unregister(self.close)
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+
+class LazyPersistence(DataPersistence):
+    """延迟创建的持久化实现，第一次保存时才构造实际的持久化实例，用于初始化开销大的实现"""
+    
+    __slots__ = ('_factory', '_instance', '_lock')
+    
+    def __init__(self, factory):
+        """初始化
+        
+        Args:
+            factory: 无参数的可调用对象，返回实际的DataPersistence实例
+        """
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+    
+    def get_instance(self):
+        """获取（必要时创建）实际的持久化实例"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+    
+    def save(self, data, output_path=None):
+        """创建实际的持久化实例并委托其保存数据"""
+        try:
+            instance = self.get_instance()
+        except Exception as e:
+            logger.error("创建持久化实例失败: %s", e)
+            return f"保存失败: {str(e)}"
+        return instance.save(data, output_path)
 
 
 class PersistenceManager:
     """持久化管理器 - 用于管理和协调多种持久化方式"""
     
+    __slots__ = ('persistence_methods',)
+    
     def __init__(self):
         """初始化持久化管理器"""
         self.persistence_methods = {}
@@ -470,22 +736,30 @@ class PersistenceManager:
         return self.persistence_methods[name].save(data, output_path)
     
     def save_all(self, data, config=None):
-        """使用所有已配置的持久化方法保存数据"""
-        results = {}
+        """使用所有已配置的持久化方法保存数据（各持久化方法互不依赖，并发执行）"""
         if config is None:
             config = {}
+        if not self.persistence_methods:
+            return {}
             
-        for name, instance in self.persistence_methods.items():
-            output_path = config.get(name)
-            results[name] = instance.save(data, output_path)
-            
-        return results
+        with ThreadPoolExecutor(max_workers=len(self.persistence_methods)) as executor:
+            futures = {
+                name: executor.submit(instance.save, data, config.get(name))
+                for name, instance in self.persistence_methods.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
 
 
 # 默认管理器实例
 _default_manager = None
 
 
+def get_faiss_persistence():
+    """创建FAISS向量数据库持久化实例（在这里才导入，导入本模块时不加载faiss等依赖）"""
+    from src.storage.vector_db import FAISSPersistence
+    return FAISSPersistence()
+
+
 def get_default_manager():
     """获取默认的持久化管理器实例"""
     global _default_manager
@@ -497,12 +771,9 @@ def get_default_manager():
         _default_manager.register_persistence('json', JSONPersistence())
         _default_manager.register_persistence('html_report', HTMLReportPersistence())
         
-        # 如果FAISS可用，注册FAISS持久化
+        # 如果FAISS可用，注册FAISS持久化，嵌入模型和索引在第一次保存时才加载
         if HAS_FAISS:
-            try:
-                _default_manager.register_persistence('faiss', FAISSPersistence())
-            except Exception as e:
-                print(f"注册FAISS持久化失败: {e}")
+            _default_manager.register_persistence('faiss', LazyPersistence(get_faiss_persistence))
     
     return _default_manager
 
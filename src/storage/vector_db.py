@@ -3,49 +3,231 @@
 """
 向量数据库持久化模块 - 使用FAISS实现向量存储和检索
 """
+import atexit
+import functools
+import hashlib
 import json
 import os
+import queue
+import threading
+from collections import Counter
 import numpy as np
 import faiss
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Union, Tuple
 from src.storage.data_persistence import DataPersistence
-from sentence_transformers import SentenceTransformer
+
+# 尝试导入orjson（可选），元数据文件的解析和序列化比标准库json快数倍
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 生成嵌入时按token截断由模型的分词器完成，这里只预先按字符截断以限制分词的工作量：
+# 截断长度取模型最大序列长度（all-MiniLM-L6-v2为256个token）乘以每个token最多覆盖的平均字符数
+EMBEDDING_MAX_TOKENS = 256
+CHARS_PER_TOKEN = 4
+EMBEDDING_BATCH_SIZE = 64
+
+# 新建索引使用的HNSW图参数：每个节点的邻居数、建图和查询时的候选队列长度
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# 嵌入模型无法报告输出维度时使用的默认维度（all-MiniLM-L6-v2的输出维度）
+DEFAULT_EMBEDDING_DIM = 384
+
+# 按日期过滤后候选文档不超过该数量时，直接在候选向量上精确计算距离，不走近似索引
+EXACT_SEARCH_MAX_CANDIDATES = 2048
+
+# 持续批量导入时建议的flush_threshold：累计新增这么多文档才写入磁盘，其余在flush()或进程退出时写入。
+# 默认每次保存都立即写入，进程被强制结束（SIGTERM、定时任务超时）时atexit不会执行
+INDEX_FLUSH_THRESHOLD = 1000
+
+# 后台生成嵌入时的队列容量（按save调用计）、每次合并处理的最大文档数及停止标记
+BACKGROUND_QUEUE_SIZE = 8
+BACKGROUND_MERGE_SIZE = 1024
+_WORKER_STOP = object()
+
+# 文档发布时间支持的日期格式（只取空格前的日期部分解析），ISO格式先用fromisoformat快速解析
+DATE_FORMATS = ('%Y/%m/%d', '%Y年%m月%d日')
+DATE_PARSE_CACHE_SIZE = 4096
+
+# 时间戳数组中表示日期未知的值，小于任何查询范围的起点
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+# 已加载的嵌入模型缓存，按模型名称复用，避免重复实例化时重新加载权重
+_MODEL_CACHE: Dict = {}
+
+
+def _create_index(embedding_dim: int = DEFAULT_EMBEDDING_DIM):
+    """创建HNSW近似最近邻索引，检索时无需扫描全部向量
+    
+    向量归一化后按内积检索，相似度即余弦相似度，距离计算只需一次点积。
+    
+    向量以半精度标量量化存储，内存占用和检索时读取的数据量减半，
+    精度损失对归一化的句向量可以忽略，且不需要训练数据。
+    """
+    index = faiss.IndexHNSWSQ(embedding_dim, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    return index
+
+
+def _load_metadata(path: str) -> Tuple[List[Dict], bool]:
+    """读取元数据文件：每行一条的JSON Lines格式，兼容旧版本整体保存的JSON数组
+    
+    Returns:
+        (元数据列表, 是否为旧版本的JSON数组格式)
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    loads = orjson.loads if HAS_ORJSON else json.loads
+    if raw.lstrip().startswith(b'['):
+        return loads(raw), True
+    return [loads(line) for line in raw.splitlines() if line.strip()], False
+
+
+def _dump_metadata_lines(metadata_list: List[Dict]) -> bytes:
+    """把元数据序列化为JSON Lines格式的字节串"""
+    if HAS_ORJSON:
+        return b''.join(orjson.dumps(m, option=orjson.OPT_NON_STR_KEYS) + b'\n' for m in metadata_list)
+    return ''.join(json.dumps(m, ensure_ascii=False) + '\n' for m in metadata_list).encode('utf-8')
+
+
+def _content_hash(content: str) -> str:
+    """文档内容的64位摘要，用于识别内容完全相同的文档"""
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
+
+
+@functools.lru_cache(maxsize=DATE_PARSE_CACHE_SIZE)
+def _parse_timestamp(doc_date: Optional[str]) -> Optional[int]:
+    """把文档日期解析为POSIX时间戳（只有日期时为当天零点），无法解析时返回None
+    
+    同一频道的文档日期大量重复，解析结果按原始字符串缓存。
+    """
+    if not doc_date:
+        return None
+    date_part = doc_date.split(' ', 1)[0]
+    try:
+        return int(datetime.fromisoformat(date_part).timestamp())
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return int(datetime.strptime(date_part, fmt).timestamp())
+        except ValueError:
+            continue
+    return None
+
+
+def _doc_timestamp(metadata: Dict) -> Optional[int]:
+    """文档的日期时间戳，优先使用发布时间，其次使用提取时间"""
+    return _parse_timestamp(metadata.get('publish_time') or metadata.get('extraction_time'))
+
+
+def _timestamp_array(metadata_list: List[Dict]) -> np.ndarray:
+    """把元数据中的日期时间戳收集为int64数组，未知日期记为NO_TIMESTAMP"""
+    return np.fromiter(
+        (NO_TIMESTAMP if m.get('_ts') is None else m['_ts'] for m in metadata_list),
+        dtype=np.int64, count=len(metadata_list)
+    )
+
+
+def _date_range_bounds(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """把查询的日期范围转换为时间戳区间，结束日期包含当天全天"""
+    start_ts = int(datetime.strptime(start_date.split(' ')[0], '%Y-%m-%d').timestamp()) if start_date else None
+    end_ts = None
+    if end_date:
+        end_datetime = datetime.strptime(end_date.split(' ')[0], '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+        end_ts = int(end_datetime.timestamp())
+    return start_ts, end_ts
+
+
+def _get_embedding_model(model_name: str):
+    """获取（必要时加载）指定名称的嵌入模型
+    
+    sentence-transformers会连带导入torch，耗时数秒，因此在第一次需要模型时才导入。
+    """
+    model = _MODEL_CACHE.get(model_name)
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name)
+        _MODEL_CACHE[model_name] = model
+    return model
+
+
 class FAISSPersistence(DataPersistence):
     """FAISS向量数据库持久化实现"""
     
     def __init__(self, index_path: str = 'vector_index.faiss', 
                  metadata_path: str = 'vector_metadata.json',
-                 embedding_model: str = 'all-MiniLM-L6-v2'):
+                 embedding_model: str = 'all-MiniLM-L6-v2',
+                 read_only: bool = False,
+                 flush_threshold: int = 1,
+                 background: bool = False):
         """初始化FAISS向量数据库
         
         Args:
             index_path: FAISS索引文件路径
-            metadata_path: 元数据文件路径
+            metadata_path: 元数据文件路径（JSON Lines格式，每次保存只追加新文档）
             embedding_model: 用于生成向量的预训练模型
+            read_only: 只读模式，供查询工具使用：不能保存新文档，退出时也不写入磁盘
+            flush_threshold: 累计新增的文档数达到该值时才写入磁盘，默认每次保存都立即写入；
+                持续批量导入时可设为INDEX_FLUSH_THRESHOLD，并在导入结束时调用flush()
+            background: 是否在后台线程中生成嵌入并添加到索引，save只将数据放入队列，不阻塞调用方
         """
         self.index_path = index_path
         self.metadata_path = metadata_path
         self.embedding_model = embedding_model
+        self.read_only = read_only
+        self.flush_threshold = flush_threshold
+        self._pending_since_flush = 0  # 上次写入磁盘之后新增的文档数
+        self._lock = threading.RLock()  # 保护索引、元数据和时间戳数组，后台线程添加文档时检索不会读到一半的状态
         
         # 加载嵌入模型
         try:
-            self.model = SentenceTransformer(embedding_model)
+            self.model = _get_embedding_model(embedding_model)
             logger.info(f"成功加载嵌入模型: {embedding_model}")
         except Exception as e:
             logger.error(f"加载嵌入模型失败: {e}")
             raise
         
+        # 预先按字符截断文本的长度，足以覆盖模型能处理的全部token
+        self.max_text_length = (getattr(self.model, 'max_seq_length', None) or EMBEDDING_MAX_TOKENS) * CHARS_PER_TOKEN
+        
         # 加载或创建FAISS索引
         self.index = None
         self.metadata = []  # 存储与向量对应的元数据
+        self._metadata_saved = 0  # 已按行写入元数据文件的条数，为0时整体重写文件
         self._load_or_create_index()
+        
+        # 已入库文档的内容摘要，内容相同的文档不再重复生成嵌入和入库
+        self._seen_hashes = {m['content_hash'] for m in self.metadata if 'content_hash' in m}
+        
+        # 内积索引中的向量都经过L2归一化，检索结果为余弦相似度（越大越相似）；
+        # 旧版本保存的L2索引继续使用未归一化的向量和L2距离（越小越相似）
+        self.inner_product = self.index.metric_type == faiss.METRIC_INNER_PRODUCT
+        
+        # 与元数据一一对应的日期时间戳数组，日期范围筛选在数组上向量化完成
+        self._ts_array = _timestamp_array(self.metadata)
+        
+        # 后台生成嵌入的线程及其数据队列
+        self._queue = None
+        self._worker = None
+        if background and not read_only:
+            self._queue = queue.Queue(maxsize=BACKGROUND_QUEUE_SIZE)
+            self._worker = threading.Thread(target=self._worker_loop, name='faiss-embedder', daemon=True)
+            self._worker.start()
+        
+        # 进程退出时处理完队列中的数据并写入尚未保存的文档
+        if not read_only:
+            atexit.register(self.close)
     
     def _load_or_create_index(self):
         """加载已有的索引或创建新索引"""
@@ -53,22 +235,36 @@ class FAISSPersistence(DataPersistence):
             # 尝试加载现有的索引和元数据
             if os.path.exists(self.index_path) and os.path.exists(self.metadata_path):
                 self.index = faiss.read_index(self.index_path)
-                with open(self.metadata_path, 'r', encoding='utf-8') as f:
-                    self.metadata = json.load(f)
+                self.metadata, legacy = _load_metadata(self.metadata_path)
+                # 旧版本的JSON数组文件在下次保存时整体改写为JSON Lines格式
+                self._metadata_saved = 0 if legacy else len(self.metadata)
+                # 旧版本保存的元数据没有预先解析的日期时间戳，加载时补齐
+                for metadata in self.metadata:
+                    if '_ts' not in metadata:
+                        metadata['_ts'] = _doc_timestamp(metadata)
                 logger.info(f"成功加载现有索引，包含 {len(self.metadata)} 个文档")
             else:
-                # 创建新的索引
-                embedding_dim = 384  # all-MiniLM-L6-v2模型的输出维度
-                self.index = faiss.IndexFlatL2(embedding_dim)  # 使用L2距离的扁平索引
+                # 创建新的索引，已保存的扁平索引仍按原类型加载
+                self.index = _create_index(self._model_dimension())
                 self.metadata = []
                 logger.info("创建了新的FAISS索引")
         except Exception as e:
             logger.error(f"加载或创建索引时出错: {e}")
             # 回退到创建新索引
-            embedding_dim = 384
-            self.index = faiss.IndexFlatL2(embedding_dim)
+            self.index = _create_index(self._model_dimension())
             self.metadata = []
     
+    def _model_dimension(self) -> int:
+        """嵌入模型输出的向量维度"""
+        try:
+            return self.model.get_sentence_embedding_dimension() or DEFAULT_EMBEDDING_DIM
+        except Exception:
+            return DEFAULT_EMBEDDING_DIM
+    
+    def _vectors(self, ids: np.ndarray) -> np.ndarray:
+        """从索引中取回指定文档的向量，只解码用到的行，不在内存中另存一份全部向量"""
+        return self.index.reconstruct_batch(np.asarray(ids, dtype=np.int64)).astype(np.float32, copy=False)
+    
     def _generate_embedding(self, text: str) -> np.ndarray:
         """生成文本的向量嵌入
         
@@ -80,13 +276,12 @@ class FAISSPersistence(DataPersistence):
         """
         try:
             # 限制文本长度以避免处理过大的文本
-            max_length = 512  # 模型的最大序列长度
-            if len(text) > max_length:
-                text = text[:max_length]
+            if len(text) > self.max_text_length:
+                text = text[:self.max_text_length]
             
             # 确保文本不为空
             if not text or not text.strip():
-                return np.zeros((1, 384), dtype=np.float32)
+                return np.zeros((1, self.index.d), dtype=np.float32)
             
             # 直接生成嵌入，SentenceTransformer的encode方法可以处理单个字符串或字符串列表
             # 注意：不同版本的sentence-transformers可能有不同的参数要求
@@ -98,11 +293,45 @@ class FAISSPersistence(DataPersistence):
                 embedding = self.model.encode([text], convert_to_tensor=False)[0]
             
             # 确保返回格式正确
-            return np.array([embedding], dtype=np.float32)
+            embedding = np.array([embedding], dtype=np.float32)
+            if self.inner_product:
+                faiss.normalize_L2(embedding)
+            return embedding
         except Exception as e:
             logger.error(f"生成嵌入时出错: {e}")
             # 返回零向量作为后备
-            return np.zeros((1, 384), dtype=np.float32)
+            return np.zeros((1, self.index.d), dtype=np.float32)
+    
+    def _generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """批量生成多段文本的向量嵌入，一次前向计算处理整批文本
+        
+        Args:
+            texts: 要嵌入的文本列表
+            
+        Returns:
+            形状为(len(texts), 向量维度)的向量数组，空文本对应零向量
+        """
+        embeddings = np.zeros((len(texts), self.index.d), dtype=np.float32)
+        
+        # 与_generate_embedding一致：截断过长文本，空文本使用零向量
+        texts = [text[:self.max_text_length] for text in texts]
+        positions = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not positions:
+            return embeddings
+        
+        try:
+            encoded = self.model.encode(
+                [texts[i] for i in positions],
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            embeddings[positions] = np.asarray(encoded, dtype=np.float32)
+        except Exception as e:
+            logger.error(f"批量生成嵌入时出错: {e}")
+        if self.inner_product:
+            faiss.normalize_L2(embeddings)
+        return embeddings
     
     def save(self, data: Union[Dict, List[Dict]], output_path: Optional[str] = None):
         """将数据保存到FAISS向量数据库
@@ -114,29 +343,49 @@ class FAISSPersistence(DataPersistence):
         Returns:
             保存结果信息
         """
+        if self.read_only:
+            logger.warning("向量数据库以只读模式打开，不能保存文档")
+            return "保存失败: 向量数据库以只读模式打开"
+        
+        # 确保数据是列表格式
+        if isinstance(data, dict):
+            data = [data]
+        
+        if self._queue is not None:
+            self._queue.put(data)
+            return f"已将 {len(data)} 个文档加入向量数据库的后台处理队列"
+        return self._add_documents(data)
+    
+    def _add_documents(self, data: List[Dict]) -> str:
+        """为一批文档生成嵌入并添加到索引"""
         try:
-            # 确保数据是列表格式
-            if isinstance(data, dict):
-                data = [data]
-            
-            # 为每个文档生成嵌入并添加到索引
-            new_embeddings = []
+            # 收集有效文档的元数据，之后对全部文档内容批量生成嵌入
+            texts = []
             new_metadata = []
+            duplicates = 0
             
             for doc in data:
-                # 检查文档是否包含必要字段
-                if 'content' not in doc:
+                # 检查文档是否包含必要字段，没有内容的文档无法生成有意义的嵌入
+                content = doc.get('content')
+                if not content:
                     logger.warning("文档缺少content字段，跳过")
                     continue
                 
-                # 生成嵌入
-                embedding = self._generate_embedding(doc['content'])
-                new_embeddings.append(embedding)
+                # 跳过内容与已入库文档（或本批中前面的文档）完全相同的文档
+                content_hash = _content_hash(content)
+                if content_hash in self._seen_hashes:
+                    duplicates += 1
+                    continue
+                self._seen_hashes.add(content_hash)
+                
+                texts.append(content)
                 
                 # 准备元数据
                 metadata_item = {
                     'title': doc.get('title', ''),
-                    'content': doc.get('content', '')[:200] + '...' if len(doc.get('content', '')) > 200 else doc.get('content', ''),
+                    'content': content[:200] + '...' if len(content) > 200 else content,
+                    # 入库时预先截取的500字片段，供对话工具构建提示词时直接使用
+                    'snippet_500': content[:500],
                     'url': doc.get('url', ''),
                     'publish_time': doc.get('publish_time', doc.get('date', '')),
                     'extraction_time': doc.get('extraction_time', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
@@ -146,50 +395,119 @@ class FAISSPersistence(DataPersistence):
                     'module_name': doc.get('module_name', ''),
                     'summary': doc.get('summary', ''),
                     'keywords': doc.get('keywords', []),
-                    'key_points': doc.get('key_points', [])
+                    'key_points': doc.get('key_points', []),
+                    'content_hash': content_hash
                 }
+                # 入库时解析一次日期，之后的日期过滤和统计只比较整数时间戳
+                metadata_item['_ts'] = _doc_timestamp(metadata_item)
                 new_metadata.append(metadata_item)
             
-            # 如果有新的嵌入，添加到索引
-            if new_embeddings:
-                # 合并所有新嵌入
-                embeddings_array = np.vstack(new_embeddings)
-                
-                # 添加到FAISS索引
-                self.index.add(embeddings_array)
-                
-                # 更新元数据
-                self.metadata.extend(new_metadata)
+            if duplicates:
+                logger.info(f"跳过 {duplicates} 个内容重复的文档")
+            
+            # 如果有新的文档，生成嵌入并添加到索引
+            if texts:
+                # 生成嵌入耗时最长，在锁外进行
+                embeddings_array = self._generate_embeddings(texts)
                 
-                # 保存索引和元数据
-                self._save_index()
+                with self._lock:
+                    # 添加到FAISS索引，需要训练的量化索引用第一批向量训练
+                    if not self.index.is_trained:
+                        self.index.train(embeddings_array)
+                    self.index.add(embeddings_array)
+                    
+                    # 更新元数据
+                    self.metadata.extend(new_metadata)
+                    self._ts_array = np.concatenate([self._ts_array, _timestamp_array(new_metadata)])
+                    
+                    # 累计足够多的新文档后再保存索引和元数据，避免每次保存都重写整个索引文件
+                    self._pending_since_flush += len(texts)
+                    if self._pending_since_flush >= self.flush_threshold:
+                        self._flush_pending()
                 
-                logger.info(f"成功添加 {len(new_embeddings)} 个文档到向量数据库")
+                logger.info(f"成功添加 {len(texts)} 个文档到向量数据库")
             else:
                 logger.warning("没有有效的文档添加到向量数据库")
             
-            return f"成功添加 {len(new_embeddings)} 个文档到向量数据库，当前总文档数: {len(self.metadata)}"
+            return f"成功添加 {len(texts)} 个文档到向量数据库，当前总文档数: {len(self.metadata)}"
         except Exception as e:
             logger.error(f"保存数据到向量数据库时出错: {e}")
             return f"保存失败: {str(e)}"
     
-    def _save_index(self):
-        """保存索引和元数据到文件"""
+    def _worker_loop(self):
+        """后台线程：取出队列中的文档，并合并当时已在排队的文档一起生成嵌入"""
+        stop = False
+        while not stop:
+            batches = [self._queue.get()]
+            items = []
+            while True:
+                if batches[-1] is _WORKER_STOP:
+                    stop = True
+                    break
+                items.extend(batches[-1])
+                if len(items) >= BACKGROUND_MERGE_SIZE:
+                    break
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                if items:
+                    self._add_documents(items)
+            except Exception as e:
+                logger.error(f"后台添加文档到向量数据库失败: {e}")
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+    
+    def flush(self):
+        """等待后台线程处理完队列中已有的文档，再把尚未写入磁盘的新文档连同索引一起保存"""
+        if self._queue is not None:
+            self._queue.join()
+        with self._lock:
+            self._flush_pending()
+    
+    def _flush_pending(self):
+        """写入尚未保存的文档（调用方需持有锁）"""
+        if self._pending_since_flush and self._save_index():
+            self._pending_since_flush = 0
+    
+    def close(self):
+        """处理完队列中的文档后停止后台线程，并保存尚未写入磁盘的文档"""
+        if self._worker is not None:
+            self._queue.put(_WORKER_STOP)
+            self._worker.join()
+            self._worker = None
+            self._queue = None
+        self.flush()
+        atexit.unregister(self.close)
+    
+    def _save_index(self) -> bool:
+        """保存索引和元数据到文件，返回是否保存成功"""
         try:
             # 保存FAISS索引
             faiss.write_index(self.index, self.index_path)
             
-            # 保存元数据
-            with open(self.metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+            # 保存元数据，只追加上次保存之后新增的文档
+            if self._metadata_saved:
+                with open(self.metadata_path, 'ab') as f:
+                    f.write(_dump_metadata_lines(self.metadata[self._metadata_saved:]))
+            else:
+                with open(self.metadata_path, 'wb') as f:
+                    f.write(_dump_metadata_lines(self.metadata))
+            self._metadata_saved = len(self.metadata)
                 
             logger.info(f"索引和元数据已保存到 {self.index_path} 和 {self.metadata_path}")
+            return True
         except Exception as e:
             logger.error(f"保存索引和元数据时出错: {e}")
+            return False
     
     def search(self, query: str, top_k: int = 5, 
                start_date: Optional[str] = None, 
-               end_date: Optional[str] = None) -> List[Dict]:
+               end_date: Optional[str] = None,
+               summary_max_chars: Optional[int] = None) -> List[Dict]:
         """在向量数据库中搜索相关文档
         
         Args:
@@ -197,80 +515,157 @@ class FAISSPersistence(DataPersistence):
             top_k: 返回的最大结果数
             start_date: 开始日期（YYYY-MM-DD或YYYY-MM-DD HH:MM:SS格式）
             end_date: 结束日期（YYYY-MM-DD或YYYY-MM-DD HH:MM:SS格式）
+            summary_max_chars: 结果中摘要保留的最大字符数，为None时返回完整摘要
             
         Returns:
             搜索结果列表
         """
+        return self.search_batch([query], top_k, start_date, end_date, summary_max_chars)[0]
+    
+    def search_batch(self, queries: List[str], top_k: int = 5,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     summary_max_chars: Optional[int] = None) -> List[List[Dict]]:
+        """一次检索多个查询，查询向量批量生成，FAISS对整批查询做一次矩阵检索
+        
+        Args:
+            queries: 搜索查询文本列表
+            top_k: 每个查询返回的最大结果数
+            start_date: 开始日期（YYYY-MM-DD或YYYY-MM-DD HH:MM:SS格式）
+            end_date: 结束日期（YYYY-MM-DD或YYYY-MM-DD HH:MM:SS格式）
+            summary_max_chars: 结果中摘要保留的最大字符数，为None时返回完整摘要
+            
+        Returns:
+            与queries一一对应的搜索结果列表
+        """
         try:
             if self.index is None or len(self.metadata) == 0:
                 logger.warning("向量数据库为空")
-                return []
+                return [[] for _ in queries]
             
-            # 生成查询向量
-            query_embedding = self._generate_embedding(query)
+            # 批量生成查询向量
+            query_embeddings = self._generate_embeddings(list(queries))
             
-            # 在FAISS中搜索
-            distances, indices = self.index.search(query_embedding, min(top_k * 2, len(self.metadata)))
-            
-            # 准备搜索结果
-            results = []
-            for i, idx in enumerate(indices[0]):
-                # 获取元数据
-                metadata = self.metadata[idx]
-                
-                # 检查日期范围
+            # 后台线程可能正在向索引添加文档，检索期间持有锁
+            with self._lock:
+                # 指定日期范围时先在时间戳数组上选出候选文档，检索只在候选文档中进行，不再多取结果后过滤
+                candidate_ids = None
                 if start_date or end_date:
-                    doc_date = metadata.get('publish_time') or metadata.get('extraction_time')
-                    if doc_date:
-                        try:
-                            # 尝试解析日期
-                            doc_datetime = None
-                            # 尝试多种日期格式
-                            for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%Y/%m/%d', '%Y年%m月%d日']:
-                                try:
-                                    doc_datetime = datetime.strptime(doc_date.split(' ')[0], fmt)
-                                    break
-                                except ValueError:
-                                    continue
-                            
-                            # 检查日期是否在范围内
-                            if doc_datetime:
-                                # 解析开始和结束日期
-                                start_datetime = datetime.strptime(start_date.split(' ')[0], '%Y-%m-%d') if start_date else None
-                                end_datetime = datetime.strptime(end_date.split(' ')[0], '%Y-%m-%d') if end_date else None
-                                
-                                # 如果有结束日期，将其设置为当天结束
-                                if end_datetime:
-                                    end_datetime = end_datetime.replace(hour=23, minute=59, second=59)
-                                
-                                # 检查日期范围
-                                if start_datetime and doc_datetime < start_datetime:
-                                    continue
-                                if end_datetime and doc_datetime > end_datetime:
-                                    continue
-                        except Exception as e:
-                            logger.warning(f"解析日期时出错: {e}")
-                            # 如果日期解析失败，仍然包含该文档
+                    candidate_ids = self._date_range_ids(start_date, end_date)
+                    if candidate_ids.size == 0:
+                        return [[] for _ in queries]
                 
-                # 添加结果
-                result = metadata.copy()
-                result['distance'] = float(distances[0][i])  # 添加相似度分数
-                results.append(result)
-            
-            # 按相似度排序并限制返回数量
-            results.sort(key=lambda x: x['distance'])
-            return results[:top_k]
+                if (candidate_ids is not None and candidate_ids.size <= EXACT_SEARCH_MAX_CANDIDATES
+                        and self.index.ntotal == len(self.metadata)):
+                    # 候选较少时精确计算比带过滤条件遍历HNSW图更快，也不会漏掉结果
+                    hits = self._search_matrix_batch(query_embeddings, candidate_ids, top_k)
+                else:
+                    # HNSW索引的候选队列不能短于要取回的结果数
+                    fetch_k = min(top_k, len(self.metadata))
+                    selector = None if candidate_ids is None else faiss.IDSelectorBatch(candidate_ids.astype(np.int64))
+                    if hasattr(self.index, 'hnsw'):
+                        params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(HNSW_EF_SEARCH, fetch_k * 4))
+                    else:
+                        params = faiss.SearchParameters(sel=selector)
+                    distances, indices = self.index.search(query_embeddings, fetch_k, params=params)
+                    hits = list(zip(indices, distances))
+                
+                # 准备搜索结果
+                all_results = []
+                for indices, distances in hits:
+                    results = []
+                    for idx, distance in zip(indices, distances):
+                        # 近似索引找不到足够的邻居时以-1填充
+                        if idx < 0:
+                            continue
+                        result = self.metadata[idx].copy()
+                        result['distance'] = float(distance)  # 添加相似度分数
+                        if summary_max_chars is not None and result.get('summary'):
+                            result['summary'] = result['summary'][:summary_max_chars]
+                        results.append(result)
+                    all_results.append(results)
+                return all_results
         except Exception as e:
             logger.error(f"搜索向量数据库时出错: {e}")
-            return []
+            return [[] for _ in queries]
+    
+    def search_matrix(self, query_embedding: np.ndarray, mask: Optional[np.ndarray] = None,
+                      k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """在候选文档的向量上进行精确的top-k检索，适合候选文档较少的场景
+        
+        Args:
+            query_embedding: 查询向量，形状为(dim,)或(1, dim)
+            mask: 候选文档的布尔掩码或下标数组，None表示全部文档
+            k: 返回的最大结果数
+            
+        Returns:
+            (文档下标数组, 分数数组)，内积索引为余弦相似度（降序），L2索引为L2距离（升序）
+        """
+        q = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        if mask is None:
+            ids = np.arange(self.index.ntotal)
+        else:
+            mask = np.asarray(mask)
+            ids = np.flatnonzero(mask) if mask.dtype == bool else mask.astype(np.int64)
+        return self._search_matrix_batch(q, ids, k)[0]
+    
+    def _search_matrix_batch(self, query_embeddings: np.ndarray, ids: np.ndarray,
+                             k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search_matrix的多查询版本：候选向量与全部查询向量一次矩阵乘（BLAS多线程）得到所有分数"""
+        if ids.size == 0 or k <= 0:
+            return [(ids[:0], np.zeros(0, dtype=np.float32)) for _ in range(len(query_embeddings))]
+        
+        sub = self._vectors(ids)
+        products = query_embeddings @ sub.T  # (查询数, 候选数)
+        if self.inner_product:
+            scores = products
+            keys = -scores
+        else:
+            scores = np.einsum('ij,ij->i', sub, sub)[None, :] - 2 * products + np.einsum('ij,ij->i', query_embeddings, query_embeddings)[:, None]
+            keys = scores
+        
+        k = min(k, ids.size)
+        top = np.argpartition(keys, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(top, np.argsort(np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+        return [(ids[row_order], row_scores[row_order]) for row_order, row_scores in zip(order, scores)]
+    
+    def _date_range_ids(self, start_date: Optional[str], end_date: Optional[str]) -> np.ndarray:
+        """获取日期范围内的检索候选文档下标，发布时间无法解析的文档仍然包含在内"""
+        start_ts, end_ts = _date_range_bounds(start_date, end_date)
+        mask = self._ts_array != NO_TIMESTAMP
+        if start_ts is not None:
+            mask &= self._ts_array >= start_ts
+        if end_ts is not None:
+            mask &= self._ts_array <= end_ts
+        mask |= self._ts_array == NO_TIMESTAMP
+        return np.flatnonzero(mask)
+    
+    def search_in_date_range(self, query: str, start_date: str, end_date: str, top_k: int = 5) -> List[Dict]:
+        """在指定日期范围内的文档中搜索相关文档，与search指定日期范围时的结果相同
+        
+        先按日期筛选出候选文档（发布时间无法解析的文档仍然包含在内），
+        候选较少时在候选文档的向量上直接计算距离，否则带过滤条件检索索引。
+        
+        Args:
+            query: 搜索查询文本
+            start_date: 开始日期（YYYY-MM-DD格式）
+            end_date: 结束日期（YYYY-MM-DD格式）
+            top_k: 返回的最大结果数
+            
+        Returns:
+            搜索结果列表，按相似度排序
+        """
+        return self.search(query, top_k, start_date, end_date)
     
-    def get_by_date_range(self, start_date: str, end_date: str, top_k: int = 20) -> List[Dict]:
+    def get_by_date_range(self, start_date: str, end_date: str, top_k: int = 20,
+                          summary_max_chars: Optional[int] = None) -> List[Dict]:
         """按日期范围获取文档
         
         Args:
             start_date: 开始日期（YYYY-MM-DD格式）
             end_date: 结束日期（YYYY-MM-DD格式）
             top_k: 返回的最大结果数
+            summary_max_chars: 结果中摘要保留的最大字符数，为None时返回完整摘要
             
         Returns:
             符合条件的文档列表
@@ -282,37 +677,22 @@ class FAISSPersistence(DataPersistence):
             
             # 解析日期范围
             try:
-                start_datetime = datetime.strptime(start_date.split(' ')[0], '%Y-%m-%d')
-                end_datetime = datetime.strptime(end_date.split(' ')[0], '%Y-%m-%d')
-                end_datetime = end_datetime.replace(hour=23, minute=59, second=59)
+                start_ts, end_ts = _date_range_bounds(start_date, end_date)
             except Exception as e:
                 logger.error(f"解析日期范围时出错: {e}")
                 return []
             
-            # 筛选符合日期范围的文档
-            results = []
-            for metadata in self.metadata:
-                doc_date = metadata.get('publish_time') or metadata.get('extraction_time')
-                if doc_date:
-                    try:
-                        # 尝试解析文档日期
-                        doc_datetime = None
-                        for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%Y/%m/%d', '%Y年%m月%d日']:
-                            try:
-                                doc_datetime = datetime.strptime(doc_date.split(' ')[0], fmt)
-                                break
-                            except ValueError:
-                                continue
-                        
-                        # 检查是否在日期范围内
-                        if doc_datetime and start_datetime <= doc_datetime <= end_datetime:
-                            results.append(metadata)
-                    except Exception as e:
-                        logger.warning(f"解析文档日期时出错: {e}")
+            # 在时间戳数组上筛选符合日期范围的文档
+            ids = np.flatnonzero((self._ts_array >= start_ts) & (self._ts_array <= end_ts))
             
-            # 按日期排序并限制结果数量
-            results.sort(key=lambda x: (x.get('publish_time') or x.get('extraction_time')), reverse=True)
-            return results[:top_k]
+            # 按日期从新到旧排序（同一天的文档保持入库顺序）并限制结果数量，最后才取出元数据
+            order = np.argsort(-self._ts_array[ids], kind='stable')[:top_k]
+            results = [self.metadata[i] for i in ids[order]]
+            if summary_max_chars is not None:
+                # 返回截断摘要后的副本，不修改元数据本身
+                results = [dict(doc, summary=doc['summary'][:summary_max_chars]) if doc.get('summary') else doc
+                           for doc in results]
+            return results
         except Exception as e:
             logger.error(f"按日期范围查询时出错: {e}")
             return []
@@ -333,33 +713,14 @@ class FAISSPersistence(DataPersistence):
             }
             
             # 按频道统计
-            channel_stats = {}
-            for metadata in self.metadata:
-                channel = metadata.get('channel', 'unknown')
-                channel_stats[channel] = channel_stats.get(channel, 0) + 1
-            stats['channels'] = channel_stats
+            stats['channels'] = dict(Counter(metadata.get('channel', 'unknown') for metadata in self.metadata))
             
-            # 按日期统计
-            date_stats = {}
-            for metadata in self.metadata:
-                doc_date = metadata.get('publish_time') or metadata.get('extraction_time')
-                if doc_date:
-                    try:
-                        # 提取日期部分
-                        date_part = doc_date.split(' ')[0]
-                        # 尝试标准化日期格式
-                        for fmt in ['%Y-%m-%d', '%Y/%m/%d', '%Y年%m月%d日']:
-                            try:
-                                parsed_date = datetime.strptime(date_part, fmt)
-                                date_key = parsed_date.strftime('%Y-%m-%d')
-                                date_stats[date_key] = date_stats.get(date_key, 0) + 1
-                                break
-                            except ValueError:
-                                continue
-                    except Exception:
-                        # 如果无法解析日期，使用原始日期字符串
-                        date_stats[date_part] = date_stats.get(date_part, 0) + 1
-            stats['dates'] = date_stats
+            # 按日期统计，先在时间戳数组上计数，每个不同的时间戳只格式化一次（按本地时区换算日期）
+            timestamps, counts = np.unique(self._ts_array[self._ts_array != NO_TIMESTAMP], return_counts=True)
+            date_stats = Counter()
+            for doc_ts, count in zip(timestamps.tolist(), counts.tolist()):
+                date_stats[datetime.fromtimestamp(doc_ts).strftime('%Y-%m-%d')] += count
+            stats['dates'] = dict(date_stats)
             
             return stats
         except Exception as e:
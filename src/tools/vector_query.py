@@ -3,10 +3,13 @@
 """
 向量数据库查询工具
 """
-import argparse
-import json
-from datetime import datetime, timedelta
-from src.storage.vector_db import FAISSPersistence
+import functools
+import sys
+# argparse、json、datetime只在用到的地方导入，作为库使用或只查看帮助时不必加载
+from src.tools.query_cache import QueryCache
+
+# 文本输出中摘要显示的字符数
+SUMMARY_DISPLAY_CHARS = 150
 
 
 class VectorQueryTool:
@@ -14,52 +17,166 @@ class VectorQueryTool:
     
     def __init__(self):
         """初始化查询工具"""
-        self.faiss_db = FAISSPersistence()
+        self._faiss_db = None
+        self._cache = QueryCache(max_size=512, ttl=300)
+    
+    @property
+    def faiss_db(self):
+        """向量数据库，首次使用时才导入并加载（faiss和numpy导入较慢，--help等不需要加载）"""
+        if self._faiss_db is None:
+            from src.storage.vector_db import FAISSPersistence
+            self._faiss_db = FAISSPersistence(read_only=True)
+        return self._faiss_db
+    
+    def _cache_key(self, query, top_k, start_date, end_date, summary_max_chars=None):
+        """查询缓存的键"""
+        # 文档数作为键的一部分：向量数据库只会新增文档，有新文档入库后旧的缓存结果自然失效
+        return (query, top_k, start_date, end_date, summary_max_chars, len(self.faiss_db.metadata))
+    
+    def _search(self, query, top_k=5, start_date=None, end_date=None, summary_max_chars=None):
+        """搜索相关文档，相同的查询在缓存有效期内直接返回上次的结果"""
+        key = self._cache_key(query, top_k, start_date, end_date, summary_max_chars)
+        results = self._cache.get(key)
+        if results is None:
+            results = self.faiss_db.search(query, top_k, start_date, end_date, summary_max_chars)
+            self._cache.put(key, results)
+        return results
     
-    def search(self, query, top_k=5, start_date=None, end_date=None):
-        """搜索相关文档"""
-        results = self.faiss_db.search(query, top_k, start_date, end_date)
+    def search(self, query, top_k=5, start_date=None, end_date=None, as_json=False, render=True):
+        """搜索相关文档
+
+        Args:
+            as_json: 输出JSON格式的结果
+            render: 是否输出结果，为False时只返回结果列表
+
+        Returns:
+            搜索结果列表
+        """
+        # 文本输出只显示摘要开头，只从数据库取回需要显示的部分；JSON输出和直接返回时保留完整摘要
+        summary_max_chars = SUMMARY_DISPLAY_CHARS if render and not as_json else None
+        results = self._search(query, top_k, start_date, end_date, summary_max_chars)
+        if render:
+            self._render_search(results, as_json)
+        return results
+    
+    def search_batch(self, queries, top_k=5, start_date=None, end_date=None, as_json=False, render=True):
+        """一次搜索多个查询，未命中缓存的查询合并为一次批量检索
+
+        Returns:
+            与queries一一对应的搜索结果列表
+        """
+        summary_max_chars = SUMMARY_DISPLAY_CHARS if render and not as_json else None
+        keys = [self._cache_key(query, top_k, start_date, end_date, summary_max_chars) for query in queries]
+        all_results = [self._cache.get(key) for key in keys]
+        
+        misses = [i for i, results in enumerate(all_results) if results is None]
+        if misses:
+            batch = self.faiss_db.search_batch([queries[i] for i in misses], top_k, start_date, end_date,
+                                               summary_max_chars)
+            for i, results in zip(misses, batch):
+                self._cache.put(keys[i], results)
+                all_results[i] = results
+        
+        if render:
+            if as_json:
+                self._write_json([{'query': query, 'results': results} for query, results in zip(queries, all_results)])
+            else:
+                for query, results in zip(queries, all_results):
+                    print(f"=== 查询: {query} ===\n")
+                    self._render_search(results)
+        return all_results
+    
+    def _render_search(self, results, as_json=False):
+        """输出搜索结果"""
+        if as_json:
+            self._write_json(results)
+            return
         
         if not results:
             print("未找到相关文档")
             return
         
         print(f"找到 {len(results)} 个相关文档:\n")
-        for i, result in enumerate(results, 1):
-            print(f"{i}. {result['title']}")
-            print(f"   相似度: {result['distance']:.4f}")
-            print(f"   发布时间: {result.get('publish_time', '未知')}")
-            print(f"   URL: {result['url']}")
-            print(f"   摘要: {result.get('summary', '')[:150]}...\n")
-            
-    def get_recent_docs(self, days=10, top_k=20):
-        """获取最近几天的文档"""
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        # 全部结果拼好后一次写出，不必每行都调用一次print
+        parts = [
+            f"{i}. {result['title']}\n"
+            f"   相似度: {result['distance']:.4f}\n"
+            f"   发布时间: {result.get('publish_time', '未知')}\n"
+            f"   URL: {result['url']}\n"
+            f"   摘要: {result.get('summary', '')[:SUMMARY_DISPLAY_CHARS]}...\n\n"
+            for i, result in enumerate(results, 1)
+        ]
+        sys.stdout.write(''.join(parts))
+    
+    def get_recent_docs(self, days=10, top_k=20, as_json=False, render=True):
+        """获取最近几天的文档
+
+        Args:
+            as_json: 输出JSON格式的结果
+            render: 是否输出结果，为False时只返回结果列表
+
+        Returns:
+            按发布时间从新到旧排列的文档列表
+        """
+        from datetime import datetime, timedelta
+        now = datetime.now()
+        end_date = now.strftime('%Y-%m-%d')
+        start_date = (now - timedelta(days=days)).strftime('%Y-%m-%d')
         
-        print(f"获取最近 {days} 天的文档 ({start_date} 至 {end_date})...\n")
-        results = self.faiss_db.get_by_date_range(start_date, end_date, top_k)
+        # 与搜索共用查询缓存，同一天内重复获取最近文档时直接复用结果
+        key = ('recent', start_date, end_date, top_k, len(self.faiss_db.metadata))
+        results = self._cache.get(key)
+        if results is None:
+            results = self.faiss_db.get_by_date_range(start_date, end_date, top_k)
+            self._cache.put(key, results)
+        
+        if render:
+            self._render_recent(results, days, start_date, end_date, as_json)
+        return results
+    
+    def _render_recent(self, results, days, start_date, end_date, as_json=False):
+        """输出最近文档列表"""
+        if as_json:
+            self._write_json(results)
+            return
         
+        print(f"获取最近 {days} 天的文档 ({start_date} 至 {end_date})...\n")
         if not results:
             print(f"未找到最近 {days} 天的文档")
             return
         
         print(f"找到 {len(results)} 个文档:\n")
-        for i, result in enumerate(results, 1):
-            print(f"{i}. {result['title']}")
-            print(f"   发布时间: {result.get('publish_time', '未知')}")
-            print(f"   URL: {result['url']}")
-            print(f"   频道: {result.get('channel_name', result.get('channel', ''))}\n")
+        parts = [
+            f"{i}. {result['title']}\n"
+            f"   发布时间: {result.get('publish_time', '未知')}\n"
+            f"   URL: {result['url']}\n"
+            f"   频道: {result.get('channel_name') or result.get('channel', '')}\n\n"
+            for i, result in enumerate(results, 1)
+        ]
+        sys.stdout.write(''.join(parts))
+    
+    def _write_json(self, data):
+        """以JSON格式输出结果，供jq等程序处理"""
+        import json
+        json.dump(data, sys.stdout, ensure_ascii=False, default=str)
+        sys.stdout.write("\n")
     
     def show_statistics(self):
         """显示向量数据库统计信息"""
+        import json
         stats = self.faiss_db.get_statistics()
-        print("向量数据库统计信息:")
-        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        # 直接写入标准输出，不先生成完整的JSON字符串
+        sys.stdout.write("向量数据库统计信息:\n")
+        json.dump(stats, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n查询缓存统计信息:\n")
+        json.dump(self._cache.stats(), sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
 
 
-def parse_args():
-    """解析命令行参数"""
+@functools.lru_cache(maxsize=1)
+def build_parser():
+    """构建命令行参数解析器（只构建一次，重复调用main时复用）"""
+    import argparse
     parser = argparse.ArgumentParser(description='向量数据库查询工具')
     
     # 子命令
@@ -67,35 +184,49 @@ def parse_args():
     
     # search 命令
     search_parser = subparsers.add_parser('search', help='搜索相关文档')
-    search_parser.add_argument('query', help='搜索查询文本')
+    search_parser.add_argument('query', nargs='+', help='搜索查询文本，可以一次提供多个查询')
     search_parser.add_argument('--top-k', type=int, default=5, help='返回的最大结果数')
     search_parser.add_argument('--start-date', help='开始日期（YYYY-MM-DD格式）')
     search_parser.add_argument('--end-date', help='结束日期（YYYY-MM-DD格式）')
+    search_parser.add_argument('--json', action='store_true', help='以JSON格式输出结果')
     
     # recent 命令
     recent_parser = subparsers.add_parser('recent', help='获取最近几天的文档')
     recent_parser.add_argument('--days', type=int, default=10, help='天数')
     recent_parser.add_argument('--top-k', type=int, default=20, help='返回的最大结果数')
+    recent_parser.add_argument('--json', action='store_true', help='以JSON格式输出结果')
     
     # stats 命令
     stats_parser = subparsers.add_parser('stats', help='显示向量数据库统计信息')
     
-    return parser.parse_args()
+    return parser
+
+
+def parse_args():
+    """解析命令行参数"""
+    return build_parser().parse_args()
 
 
 def main():
     """主函数"""
-    args = parse_args()
+    parser = build_parser()
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
+        return
+    
+    # 向量数据库在实际执行命令时才加载
     tool = VectorQueryTool()
     
     if args.command == 'search':
-        tool.search(args.query, args.top_k, args.start_date, args.end_date)
+        if len(args.query) > 1:
+            tool.search_batch(args.query, args.top_k, args.start_date, args.end_date, args.json)
+        else:
+            tool.search(args.query[0], args.top_k, args.start_date, args.end_date, args.json)
     elif args.command == 'recent':
-        tool.get_recent_docs(args.days, args.top_k)
+        tool.get_recent_docs(args.days, args.top_k, args.json)
     elif args.command == 'stats':
         tool.show_statistics()
-    else:
-        parser.print_help()
 
 
 if __name__ == "__main__":